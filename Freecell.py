@@ -1,13 +1,32 @@
 import random
+import signal
 import sys
 import time
-from collections import deque
+from collections import Counter, deque
+from fractions import Fraction
+from queue import Empty
+import functools
+import hashlib
 import heapq
+import itertools
+import mmap
+import pickle
+from array import array
+from bisect import bisect_left
+import multiprocessing
+import sqlite3
+import tempfile
+import zlib
 import pygame
 import os
 import psutil
 import platform
 
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: batched heuristic evaluation needs it
+    np = None
+
 
 pygame.init()
 
@@ -36,8 +55,8 @@ LIGHT_RED = (255, 99, 71)
 YELLOW = (255, 255, 0)
 STEP_HIGHLIGHT = (0, 255, 0)  # Green for recently moved card in paused auto-solve
 
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("FreeCell Solver")
+# The window is created in main() so that solver worker processes stay headless
+screen = None
 
 # Font
 font = pygame.font.SysFont("Arial", 22)
@@ -56,6 +75,20 @@ solving = False
 last_moved_card = None  # Tracks the last moved card in paused auto-solve mode
 auto_moves_enabled = False  # Start with automoves disabled
 empty_to_empty_moves_disabled = False  # Start with empty-to-empty moves enabled
+batch_heuristics_enabled = False  # Score children in NumPy batches, over deltas
+incremental_heuristics_enabled = True  # Score children with the *_delta methods
+heuristic_delta_debug = False  # Check every delta against a full recomputation
+bucket_open_list_enabled = False  # Best-first open lists use f-value buckets
+deferred_evaluation_enabled = False  # Build and score children only when popped
+foundation_layers_enabled = False  # Drop visited states below the frontier's foundation count
+prune_reversals_enabled = False  # Search skips moves that undo the previous move
+prune_empty_cascade_targets_enabled = False  # Search tries one empty cascade per source
+prune_commuting_moves_enabled = False  # Search plays independent moves in one order only
+sleep_sets_enabled = False  # Search generates one interleaving of independent moves
+dig_out_moves_enabled = False  # Search also offers macro moves that expose a needed card
+dead_end_detection_enabled = False  # Search drops children that can provably never be solved
+endgame_tablebase_enabled = False  # Best-first search finishes small endgames from the tablebase
+solution_database_enabled = False  # Solvers reuse and record solutions in the solution database
 
 # Game timer
 game_timer = 0.0
@@ -65,6 +98,22 @@ search_active = False
 search_text = ""
 current_game_number = None  # Keep track of the current game number
 
+# Card and state encoding: cards are numbered suit-major in this suit order
+SUITS = ["H", "D", "C", "S"]
+# Location codes used by FreeCellGame.pack(): cascade c at depth d -> c * 25 + d
+FREE_CELL_CODE = 200  # + free cell index
+FOUNDATION_CODE = 204
+ABSENT_CODE = 255  # Card not part of a reduced deck
+# heuristic3 orders cards by suit letter, then rank
+SUIT_SORT_OFFSET = {suit: 13 * i for i, suit in enumerate(sorted(SUITS))}
+
+# Endgame tablebase file, see build_endgame_tablebase()
+ENDGAME_TABLEBASE_PATH = "tablebases/endgame.fctb"
+# Per-suit pattern database file, see build_pattern_database()
+PATTERN_DATABASE_PATH = "tablebases/patterns.fcpd"
+# Known solutions and dead ends, see SolutionDatabase
+SOLUTION_DATABASE_PATH = "tablebases/solutions.sqlite"
+
 
 class Card:
     def __init__(self, suit, rank):
@@ -90,6 +139,15 @@ class Card:
     def __hash__(self):
         return hash((self.suit, self.rank))
 
+    def to_index(self):
+        """Returns the card number (0-51) used by the compact state encodings."""
+        return SUITS.index(self.suit) * 13 + self.rank - 1
+
+    @classmethod
+    def from_index(cls, index):
+        """Creates the card with the given card number (0-51)."""
+        return cls(SUITS[index // 13], index % 13 + 1)
+
     def draw(self, x, y, highlighted=False):
         bg_color = HIGHLIGHT if highlighted else WHITE
         pygame.draw.rect(screen, bg_color, (x, y, CARD_WIDTH, CARD_HEIGHT))
@@ -141,9 +199,11 @@ class FreeCellGame:
         player_moves (list): A list storing moves made by the player, including automatic moves.
         deck_size (int): The number of cards in the deck (default is 52).
         difficulty (str or None): The difficulty level of the game, if specified.
+
+    Passing deal=False creates an empty board (used when a state is decoded).
     """
 
-    def __init__(self, initial_state=None, deck_size=52, difficulty=None):
+    def __init__(self, initial_state=None, deck_size=52, difficulty=None, deal=True):
         self.cascades = [[] for _ in range(8)]
         self.free_cells = [None] * 4
         self.foundations = {"H": [], "D": [], "C": [], "S": []}
@@ -151,6 +211,7 @@ class FreeCellGame:
         self.player_moves = []  # For player moves in single-player mode, including automoves
         self.deck_size = deck_size
         self.difficulty = difficulty
+        self._locations = None  # Card location index, see card_locations()
 
         if initial_state is None:
             if difficulty is not None:
@@ -160,7 +221,7 @@ class FreeCellGame:
                     self.free_cells = loaded_game.free_cells
                     self.foundations = loaded_game.foundations
                     self.deck_size = loaded_game.deck_size
-            else:
+            elif deal:
                 self.new_game()
         else:
             for i in range(8):
@@ -169,6 +230,8 @@ class FreeCellGame:
             for suit in self.foundations:
                 self.foundations[suit] = initial_state.foundations[suit].copy()
             self.deck_size = initial_state.deck_size
+            if initial_state._locations is not None:
+                self._locations = initial_state._locations.copy()
 
     def setup_difficulty(self, difficulty):
         """
@@ -186,6 +249,7 @@ class FreeCellGame:
         self.cascades = [[] for _ in range(8)]
         self.free_cells = [None] * 4
         self.foundations = {"H": [], "D": [], "C": [], "S": []}
+        self._locations = None
         files = {
             "easy": [164, 1187, 3148, 9998, 10913],
             "hard": [169, 20810, 32483, 44732],
@@ -211,6 +275,7 @@ class FreeCellGame:
         random.shuffle(deck)
         for i, card in enumerate(deck):
             self.cascades[i % 8].append(card)
+        self._locations = None
 
     def is_solved(self):
         """
@@ -394,6 +459,219 @@ class FreeCellGame:
                         )
         return valid_moves
 
+    def get_search_moves(self, last_move=None, pruned=None):
+        """
+        Returns the moves a search should try from this state: `get_valid_moves()`
+        minus those removed by the enabled pruning rules.
+
+        - `prune_reversals_enabled`: drops the move that undoes `last_move` (a card
+          sent back to the free cell or cascade it just came from).
+        - `prune_empty_cascade_targets_enabled`: empty cascades are interchangeable,
+          so each source (and sequence length) gets only the first empty one.
+        - `prune_commuting_moves_enabled`: when a move and `last_move` are
+          independent (see `moves_commute`), only the order in which the smaller
+          move comes first is kept. Not applied with auto-moves, whose extra
+          foundation moves make `last_move` not the move the search chose.
+
+        With `dig_out_moves_enabled`, the macro moves of `get_dig_out_moves` are
+        added at the end.
+
+        Args:
+            last_move (tuple, optional): The move that led to this state.
+            pruned (Counter, optional): Incremented per rule for every pruned move.
+
+        Returns:
+            list: The remaining moves, in `get_valid_moves()` order.
+        """
+        valid_moves = self.get_valid_moves()
+        macro_moves = self.get_dig_out_moves() if dig_out_moves_enabled else []
+        if not (
+            prune_reversals_enabled
+            or prune_empty_cascade_targets_enabled
+            or prune_commuting_moves_enabled
+        ):
+            return valid_moves + macro_moves
+        reversal = (
+            inverse_move(last_move) if prune_reversals_enabled and last_move else None
+        )
+        commute = prune_commuting_moves_enabled and last_move and not auto_moves_enabled
+        empty_targets = set()
+        search_moves = []
+        for move in valid_moves:
+            rule = None
+            if reversal and move[:3] == reversal[:3] and (
+                move[0] == "free_cell" or move == reversal
+            ):
+                rule = "reversal"
+            elif (
+                prune_empty_cascade_targets_enabled
+                and move[0] in ("cascade", "supermove")
+                and not self.cascades[move[3]]
+            ):
+                target_class = (move[1], move[2], move[4] if len(move) > 4 else 1)
+                if target_class in empty_targets:
+                    rule = "empty_cascade"
+                empty_targets.add(target_class)
+            if rule is None and commute and move < last_move:
+                if moves_commute(move, last_move):
+                    rule = "commuting"
+            if rule is None:
+                search_moves.append(move)
+            elif pruned is not None:
+                pruned[rule] += 1
+        return search_moves + macro_moves
+
+    def get_dig_out_moves(self):
+        """
+        Generates "dig-out" macro moves: for each suit whose next foundation card
+        is buried in a cascade, the sequence of moves that clears the cards above
+        it, found by `_dig_out`. Only sequences of two or more moves are offered;
+        a single move is already one of the ordinary moves.
+
+        Returns:
+            list: Macro moves ("dig_out", "cascade", cascade_idx, suit, moves),
+                  where moves is the tuple of ordinary moves to play in order.
+        """
+        macro_moves = []
+        for suit in SUITS:
+            card = self.next_needed(suit)
+            if card is None or self.blockers_above(card) < 2:
+                continue  # One blocker is cleared by a single ordinary move
+            _, cascade_idx, depth = self.card_location(card)
+            moves = self._dig_out(cascade_idx, depth)
+            # Blockers forming a movable sequence go in a single supermove
+            if moves is not None and len(moves) >= 2:
+                macro_moves.append(("dig_out", "cascade", cascade_idx, suit, moves))
+        return macro_moves
+
+    def _dig_out(self, cascade_idx, depth):
+        """
+        Plays, on a copy, ordinary moves that take the cards above position
+        `depth` of a cascade elsewhere. Each step picks, among the valid moves
+        from that cascade that leave the buried card in place, a foundation move,
+        then the longest sequence onto another cascade, then the longest
+        sequence (two cards or more) into an empty cascade, then a free cell, and
+        a single card into an empty cascade last. Sequence lengths are limited by
+        `max_cards_movable`, as in `get_valid_moves`.
+
+        Returns:
+            tuple or None: The moves played, or None if the cards cannot all be
+                           moved with the free cells and empty cascades available.
+        """
+        game = FreeCellGame(self)
+        moves = []
+        while len(game.cascades[cascade_idx]) > depth + 1:
+            above = len(game.cascades[cascade_idx]) - depth - 1
+            best = None
+            for move in game.get_valid_moves():
+                if move[1] != "cascade" or move[2] != cascade_idx:
+                    continue
+                num_cards = move[4] if move[0] == "supermove" else 1
+                if num_cards > above:
+                    continue
+                if move[0] == "foundation":
+                    rank = 0
+                elif move[0] == "free_cell":
+                    rank = 3
+                elif game.cascades[move[3]]:
+                    rank = 1
+                else:
+                    rank = 2 if num_cards > 1 else 4
+                if best is None or (rank, -num_cards) < best[0]:
+                    best = ((rank, -num_cards), move)
+            if best is None:
+                return None
+            game.make_move(best[1])
+            moves.append(best[1])
+        return tuple(moves)
+
+    def dead_end_rule(self):
+        """
+        Checks whether the state can provably never be solved. Only states with
+        every free cell taken and no empty cascade are examined; with a free
+        space left, some card can always move.
+
+        Rules, by the name reported in `metrics.dead_ends`:
+        - "no_moves": no valid move is left.
+        - "frozen_cards": some cards can never move again (see `_frozen_cards`),
+          so they never reach the foundations.
+
+        Returns:
+            str or None: The name of the rule that proves the dead end, or None.
+        """
+        if None in self.free_cells or not all(self.cascades):
+            return None
+        if not self.get_valid_moves():
+            return "no_moves"
+        if self._frozen_cards():
+            return "frozen_cards"
+        return None
+
+    def _frozen_cards(self):
+        """
+        Returns the largest set of cards that provably never move again: starting
+        from every card not on a foundation, a card is dropped while, assuming
+        the remaining cards stay put, it might still move. A card covered by a
+        card that stays and does not continue a sequence on it stays: moving it
+        would move that card too. Any other card stays only if
+        - a lower card of its suit stays, so it cannot go to its foundation;
+        - each card it could be placed on is on a foundation, in a free cell, or
+          covered by a card that stays;
+        - for a cascade card, every free cell holds a card that stays, so no cell
+          ever frees up;
+        - every cascade's bottom card stays, so no cascade ever empties;
+        - the card below it stays, so it cannot be carried by a sequence move.
+        If these hold for every card of the set, no move can ever take the first
+        of them off its place, so the set is closed under the moves.
+
+        Returns:
+            set: Card numbers (see `Card.to_index`) of the frozen cards.
+        """
+        locations = self.card_locations()
+        above = {}
+        below = {}
+        for cascade in self.cascades:
+            indices = [card.to_index() for card in cascade]
+            for lower, upper in zip(indices, indices[1:]):
+                above[lower] = upper
+                below[upper] = lower
+        bottoms = [cascade[0].to_index() for cascade in self.cascades]
+        cells = [card.to_index() for card in self.free_cells]
+        frozen = {i for i, code in enumerate(locations) if code < FOUNDATION_CODE}
+
+        def may_move(index):
+            suit, rank = divmod(index, 13)
+            upper = above.get(index)
+            if upper in frozen and not (
+                upper % 13 == rank - 1 and (upper < 26) != (suit < 2)
+            ):
+                return False
+            if not any(suit * 13 + lower in frozen for lower in range(rank)):
+                return True
+            if rank < 12:
+                for opposite in (2, 3) if suit < 2 else (0, 1):
+                    parent = opposite * 13 + rank + 1
+                    code = locations[parent]
+                    if code >= FREE_CELL_CODE:
+                        continue  # On a foundation, in a free cell or not dealt
+                    if parent not in frozen or above.get(parent) not in frozen:
+                        return True
+            if locations[index] < FREE_CELL_CODE:
+                if not all(cell in frozen for cell in cells):
+                    return True
+                if index in below and below[index] not in frozen:
+                    return True
+            return not all(bottom in frozen for bottom in bottoms)
+
+        changed = True
+        while changed and frozen:
+            changed = False
+            for index in list(frozen):
+                if may_move(index):
+                    frozen.discard(index)
+                    changed = True
+        return frozen
+
     def get_automatic_foundation_moves(self):
         """
         Identifies moves that automatically transfer cards to the foundation.
@@ -603,6 +881,19 @@ class FreeCellGame:
                 self.cascades[dest].append(card)
                 if solving and paused:
                     last_moved_card = ("cascade", dest, card)
+        if self._locations is not None:
+            if move_type == "supermove":
+                depth = len(self.cascades[dest]) - num_cards
+                for card in cards:
+                    self._locations[card.to_index()] = dest * 25 + depth
+                    depth += 1
+            elif move_type == "foundation":
+                self._locations[card.to_index()] = FOUNDATION_CODE
+            elif move_type == "free_cell":
+                self._locations[card.to_index()] = FREE_CELL_CODE + dest
+            else:
+                code = dest * 25 + len(self.cascades[dest]) - 1
+                self._locations[card.to_index()] = code
         if is_player_move:
             self.player_moves.append(
                 ("manual" if move_type != "foundation" else "auto", move)
@@ -684,6 +975,61 @@ class FreeCellGame:
                             break
         return auto_moves
 
+    def is_safe_autoplay(self, card):
+        """
+        Checks whether a card that can go to its foundation is safe to play there
+        automatically: both opposite-color cards one rank lower are already on
+        the foundations, so no card can still need it as a cascade target.
+        """
+        opposite = ("C", "S") if card.suit in ("H", "D") else ("H", "D")
+        return all(len(self.foundations[suit]) >= card.rank - 1 for suit in opposite)
+
+    def play_safe_autoplay(self):
+        """
+        Plays safe foundation moves (see `is_safe_autoplay`) from the cascade
+        tops and free cells until none is left.
+
+        Returns:
+            list: The foundation moves made, in order.
+        """
+        played = []
+        changed = True
+        while changed:
+            changed = False
+            sources = [
+                ("cascade", i, cascade[-1])
+                for i, cascade in enumerate(self.cascades)
+                if cascade
+            ] + [("free_cell", i, card) for i, card in enumerate(self.free_cells) if card]
+            for source_type, source_idx, card in sources:
+                if self.can_move_to_foundation(card) and self.is_safe_autoplay(card):
+                    move = ("foundation", source_type, source_idx, card.suit)
+                    self.make_move(move)
+                    played.append(move)
+                    changed = True
+                    break
+        return played
+
+    def successor(self, move):
+        """
+        Returns the state reached by `move` in a search, as a new game, and the
+        explicit moves that lead there: the move itself followed, when
+        `auto_moves_enabled` is set, by the safe autoplay moves that come after
+        it. The autoplay moves do not add a search level, but the returned moves
+        can be played back one by one. A dig-out macro move (see
+        `get_dig_out_moves`) is expanded into the ordinary moves it stands for.
+        """
+        new_game = FreeCellGame(self)
+        if move[0] == "dig_out":
+            played = list(move[4])
+        else:
+            played = [move]
+        for atomic_move in played:
+            new_game.make_move(atomic_move)
+        if auto_moves_enabled:
+            played += new_game.play_safe_autoplay()
+        return new_game, played
+
     def undo_last_move(self):
         """
         Undoes the last move made by the player, either manual or automatic.
@@ -700,6 +1046,7 @@ class FreeCellGame:
         """
         if not self.player_moves:
             return False
+        self._locations = None
         last_action = self.player_moves.pop()
         _, move = last_action  # Ignore action_type, treat all moves the same
 
@@ -1065,78 +1412,177 @@ class FreeCellGame:
         """
         Computes the estimated minimum number of moves required to complete the foundations using a more detailed approach.
 
-        The function calculates the minimum number of moves by processing each card in the cascades and free cells,
-        considering the blockers (cards in the way) and the gap between the current card rank and the required rank
-        in the foundations. It accounts for cards already moved to the foundations and estimates the required moves
-        based on the current game state.
+        Cards are processed in (suit, rank) order. Each card costs one move to reach
+        its foundation plus one for every card above it in its cascade that has not
+        been processed yet, i.e. that sorts after it; free cell cards cost one move.
+        Every card on the board is the next one needed once the lower cards of its
+        suit are processed, so no sort is needed: each cascade is scanned top-down
+        with a bitmask of the sort keys seen so far.
 
         Returns:
             int: The estimated total number of moves required to complete the game.
         """
-        # Track cards in foundations
-        cards_in_foundations = {
-            suit: set(card.rank for card in self.foundations[suit])
-            for suit in ["H", "D", "C", "S"]
-        }
-
         total_min_moves = 0
-        # Track next rank needed for each suit
-        next_rank_needed = {
-            suit: max(cards_in_foundations[suit], default=0) + 1
-            for suit in ["H", "D", "C", "S"]
-        }
+        for cascade in self.cascades:
+            above = 0  # Bit k set: the card with sort key k lies higher up
+            for card in reversed(cascade):
+                key = SUIT_SORT_OFFSET[card.suit] + card.rank
+                total_min_moves += 1 + (above >> key).bit_count()
+                above |= 1 << (key - 1)
+        return total_min_moves + sum(1 for card in self.free_cells if card)
+
+    def pattern_database_heuristic(self):
+        """
+        Estimates the moves left from the per-suit pattern database (see
+        PatternDatabase): for every suit, the exact cost of its next few
+        foundation cards in an abstraction that ignores the other suits, plus
+        one move per card beyond them and per other card covering them. The
+        database file is opened, and built if missing, on first use.
 
-        # Track which cards have been "moved" to foundation (suit, rank)
-        moved_to_foundation = set(
-            (suit, rank)
-            for suit in cards_in_foundations
-            for rank in cards_in_foundations[suit]
-        )
+        Returns:
+            int: The estimated total number of moves required to complete the game.
+        """
+        return get_pattern_database().evaluate(self)
 
-        # Flatten all cards with context
-        all_cards = []
-        for i, cascade in enumerate(self.cascades):
-            for j, card in enumerate(cascade):
-                all_cards.append((card, "cascade", i, j))
-        for i, card in enumerate(self.free_cells):
-            if card:
-                all_cards.append((card, "free_cell", i, 0))
-
-        # Sort by suit and rank (low to high)
-        all_cards.sort(key=lambda x: (x[0].suit, x[0].rank))
-
-        # Process cards sequentially
-        for card, location, idx, pos in all_cards:
-            suit = card.suit
-            rank = card.rank
-
-            if rank >= next_rank_needed[suit]:
-                if location == "cascade":
-                    # Count blockers, excluding cards already "moved"
-                    cascade = self.cascades[idx]
-                    blockers = 0
-                    for blocking_card in cascade[pos + 1 :]:  # Cards above current card
-                        if (
-                            blocking_card.suit,
-                            blocking_card.rank,
-                        ) not in moved_to_foundation:
-                            blockers += 1
-                else:  # free_cell
-                    blockers = 0
-
-                if rank == next_rank_needed[suit]:
-                    # Exact next card needed
-                    moves = max(1, blockers + 1)  # 1 to move to foundation + blockers
-                    total_min_moves += moves
-                    next_rank_needed[suit] = rank + 1
-                    moved_to_foundation.add((suit, rank))  # Mark as moved
-                else:
-                    # Higher than needed, estimate with gap
-                    gap = rank - next_rank_needed[suit]
-                    moves = max(1, blockers + gap + 1)
-                    total_min_moves += moves
+    def _move_effect(self, move):
+        """
+        Describes what a move (not yet made) changes in this state.
 
-        return total_min_moves
+        Returns:
+            tuple: (cards, below, dest_top) - the cards moved, bottom first; the
+                   card left on top of the source cascade (None if the source is
+                   a free cell or becomes empty); and the card the moved cards
+                   are placed on (None unless the target is a non-empty cascade).
+        """
+        move_type, source_type, source_idx, dest = move[0], move[1], move[2], move[3]
+        below = None
+        if source_type == "cascade":
+            source = self.cascades[source_idx]
+            num_cards = move[4] if move_type == "supermove" else 1
+            cards = source[-num_cards:]
+            if len(source) > num_cards:
+                below = source[-num_cards - 1]
+        else:
+            cards = [self.free_cells[source_idx]]
+        dest_top = None
+        if move_type in ("cascade", "supermove") and self.cascades[dest]:
+            dest_top = self.cascades[dest][-1]
+        return cards, below, dest_top
+
+    def _tops_mobility_penalty(self, tops, foundation_ranks, occupied_free_cells):
+        """
+        Mobility penalty of `calculate_mobility_penalty` computed from the cascade
+        tops alone, in O(8).
+        """
+        top_keys = {(card.rank, card.color) for card in tops if card}
+        has_empty_cascade = not all(tops)
+        penalty = 0
+        for card in tops:
+            if (
+                card
+                and foundation_ranks[card.suit] != card.rank - 1
+                and not has_empty_cascade
+                and (card.rank + 1, BLACK if card.color == RED else RED) not in top_keys
+            ):
+                penalty += 50
+        return penalty + occupied_free_cells * 50
+
+    def heuristic1_delta(self, score, move):
+        """
+        Returns heuristic1 of the state after `move`, given this state's score.
+        """
+        return score - 1 if move[0] == "foundation" else score
+
+    def heuristic2_delta(self, score, move):
+        """
+        Returns heuristic2 of the state after `move`, given this state's score.
+
+        Only foundation moves change heuristic2: the moved card (worth 1) leaves
+        the board, and every remaining card of that suit at least two ranks above
+        it now misses one card less.
+        """
+        if move[0] != "foundation":
+            return score
+        cards, _, _ = self._move_effect(move)
+        max_rank = 13 if self.deck_size == 52 else 7 if self.deck_size == 28 else 3
+        return score - 1 - max(0, max_rank - cards[0].rank - 1)
+
+    def heuristic3_delta(self, score, move):
+        """
+        Returns heuristic3 of the state after `move`, given this state's score.
+
+        heuristic3 equals the number of cards on the board plus, for every card in
+        a cascade, the cards above it that sort after it by (suit, rank). Only the
+        source and destination cascades need to be rescanned.
+        """
+        cards, _, _ = self._move_effect(move)
+        move_type, source_type, source_idx, dest = move[0], move[1], move[2], move[3]
+        if source_type == "cascade":
+            for card in self.cascades[source_idx][: -len(cards)]:
+                key = (card.suit, card.rank)
+                score -= sum(1 for moved in cards if (moved.suit, moved.rank) > key)
+        if move_type in ("cascade", "supermove"):
+            for card in self.cascades[dest]:
+                key = (card.suit, card.rank)
+                score += sum(1 for moved in cards if (moved.suit, moved.rank) > key)
+        elif move_type == "foundation":
+            score -= 1
+        return score
+
+    def meta_heuristic2_delta(self, score, move):
+        """
+        Returns meta_heuristic2 of the state after `move`, given this state's
+        score. Only the pair broken at the source and the pair formed at the
+        destination change.
+        """
+        cards, below, dest_top = self._move_effect(move)
+        if move[0] == "foundation":
+            score -= 10
+        if move[1] == "free_cell":
+            score -= 5
+        if move[0] == "free_cell":
+            score += 5
+        for lower, present in ((below, -1), (dest_top, 1)):
+            if lower and not (
+                lower.rank == cards[0].rank + 1 and lower.color != cards[0].color
+            ):
+                score += present
+        return score
+
+    def meta_heuristic_delta(self, score, move):
+        """
+        Returns meta_heuristic of the state after `move`, given this state's
+        score. Foundation, free cell and sequence penalties change only at the
+        cards involved; the mobility penalty is recomputed from the cascade tops
+        before and after the move instead of with 8x8 `can_move_to_cascade` calls.
+        """
+        cards, below, dest_top = self._move_effect(move)
+        move_type, source_type, source_idx, dest = move[0], move[1], move[2], move[3]
+        occupied = sum(1 for cell in self.free_cells if cell)
+        ranks = {suit: len(cards_) for suit, cards_ in self.foundations.items()}
+        tops = [cascade[-1] if cascade else None for cascade in self.cascades]
+        score -= self._tops_mobility_penalty(tops, ranks, occupied)
+
+        if move_type == "foundation":
+            score -= 50
+            ranks[dest] += 1
+        if source_type == "free_cell":
+            score -= 100
+            occupied -= 1
+        else:
+            tops[source_idx] = below
+        if move_type == "free_cell":
+            score += 100
+            occupied += 1
+        elif move_type in ("cascade", "supermove"):
+            tops[dest] = cards[-1]
+        for lower, present in ((below, -1), (dest_top, 1)):
+            if lower:
+                if lower.rank != cards[0].rank + 1:
+                    score += 20 * present
+                if lower.color == cards[0].color:
+                    score += 10 * present
+        return score + self._tops_mobility_penalty(tops, ranks, occupied)
 
     def __lt__(self, other):
         return self.heuristic3() < other.heuristic3()
@@ -1161,6 +1607,122 @@ class FreeCellGame:
             )
         )
 
+    def card_locations(self):
+        """
+        Returns the card location index: the `pack()` location code of every card
+        number.
+
+        The index is built on first use, then kept up to date by `make_move` and
+        copied with the state, so finding a card is a single lookup. Code that
+        edits the piles directly must reset `self._locations` to None.
+
+        Returns:
+            bytearray: 52 location codes (see FREE_CELL_CODE, FOUNDATION_CODE, ABSENT_CODE).
+        """
+        if self._locations is None:
+            codes = bytearray([ABSENT_CODE]) * 52
+            for i, cascade in enumerate(self.cascades):
+                for depth, card in enumerate(cascade):
+                    codes[card.to_index()] = i * 25 + depth
+            for i, card in enumerate(self.free_cells):
+                if card:
+                    codes[card.to_index()] = FREE_CELL_CODE + i
+            for cards in self.foundations.values():
+                for card in cards:
+                    codes[card.to_index()] = FOUNDATION_CODE
+            self._locations = codes
+        return self._locations
+
+    def card_location(self, card):
+        """
+        Finds a card in O(1).
+
+        Returns:
+            tuple or None: ("cascade", index, depth), ("free_cell", index, 0) or
+                           ("foundation", suit, rank - 1); None if the card is not
+                           part of the deck.
+        """
+        code = self.card_locations()[card.to_index()]
+        if code < FREE_CELL_CODE:
+            return ("cascade", code // 25, code % 25)
+        if code < FOUNDATION_CODE:
+            return ("free_cell", code - FREE_CELL_CODE, 0)
+        if code == FOUNDATION_CODE:
+            return ("foundation", card.suit, card.rank - 1)
+        return None
+
+    def blockers_above(self, card):
+        """
+        Returns the number of cards on top of `card` in its cascade, in O(1)
+        (0 for cards outside the cascades).
+        """
+        code = self.card_locations()[card.to_index()]
+        if code >= FREE_CELL_CODE:
+            return 0
+        return len(self.cascades[code // 25]) - code % 25 - 1
+
+    def next_needed(self, suit):
+        """
+        Returns the next card the foundation of `suit` needs, or None once the
+        suit is complete.
+        """
+        rank = len(self.foundations[suit]) + 1
+        max_rank = 13 if self.deck_size == 52 else 7 if self.deck_size == 28 else 3
+        return Card(suit, rank) if rank <= max_rank else None
+
+    def foundation_count(self):
+        """
+        Returns the number of cards on the foundations. Search moves never take a
+        card off a foundation, so this count never decreases along a path.
+        """
+        return sum(len(cards) for cards in self.foundations.values())
+
+    def pack(self):
+        """
+        Encodes the state as 52 bytes, one location code per card number.
+
+        Unlike `hash()`, the encoding is the same in every process, so it can be
+        used to send states between workers or store them on disk.
+
+        Returns:
+            bytes: The packed state (see FREE_CELL_CODE, FOUNDATION_CODE, ABSENT_CODE).
+        """
+        return bytes(self.card_locations())
+
+    @classmethod
+    def unpack(cls, packed):
+        """
+        Rebuilds a game state from the output of `pack()`.
+
+        Args:
+            packed (bytes): A 52-byte packed state.
+
+        Returns:
+            FreeCellGame: The decoded state.
+        """
+        game = cls(deck_size=52 - packed.count(ABSENT_CODE), deal=False)
+        placed = [[] for _ in range(8)]
+        for index, code in enumerate(packed):
+            if code < FREE_CELL_CODE:
+                placed[code // 25].append((code % 25, index))
+            elif code < FOUNDATION_CODE:
+                game.free_cells[code - FREE_CELL_CODE] = Card.from_index(index)
+        for i, cards in enumerate(placed):
+            game.cascades[i] = [Card.from_index(index) for _, index in sorted(cards)]
+        for s, suit in enumerate(SUITS):
+            count = packed[s * 13 : s * 13 + 13].count(FOUNDATION_CODE)
+            game.foundations[suit] = [Card(suit, rank) for rank in range(1, count + 1)]
+        game._locations = bytearray(packed)
+        return game
+
+    def fingerprint(self):
+        """
+        Returns a 64-bit fingerprint of the state that, unlike `hash()`, does not
+        change between processes.
+        """
+        digest = hashlib.blake2b(self.pack(), digest_size=8).digest()
+        return int.from_bytes(digest, "little")
+
     def draw(
         self,
         highlight_move=None,
@@ -1711,8 +2273,29 @@ class PerformanceMetrics:
         peak_memory (float): Peak memory usage observed during the execution in MB.
         avg_memory (float): Average memory usage over the execution.
         memory_snapshots (list): List of memory snapshots taken throughout the execution.
+        pruned_moves (Counter): Moves removed by each rule of `get_search_moves`.
+        dead_ends (Counter): Children dropped by each rule of `dead_end_rule`.
+        states_reclaimed (int): Visited states dropped by FoundationLayers.
+        memory_reclaimed (float): Approximate memory of those states in MB.
+        optimality_proven (bool or None): Set by solvers that guarantee optimal
+            solutions: True when the search finished within its budget, so the
+            solution is a shortest one (or no solution exists), False otherwise.
     """
 
+    SUMMARY_FIELDS = (
+        "states_explored",
+        "states_generated",
+        "max_queue_size",
+        "solution_length",
+        "max_depth_reached",
+        "peak_memory",
+        "optimality_proven",
+        "states_reclaimed",
+        "memory_reclaimed",
+        "pruned_moves",
+        "dead_ends",
+    )
+
     def __init__(self):
         # Initialize process tracking and reset metrics
         self.process = psutil.Process(os.getpid())
@@ -1739,6 +2322,11 @@ class PerformanceMetrics:
         self.peak_memory = 0
         self.avg_memory = 0
         self.memory_snapshots = []
+        self.optimality_proven = None
+        self.states_reclaimed = 0
+        self.memory_reclaimed = 0
+        self.pruned_moves = Counter()
+        self.dead_ends = Counter()
 
         # Take initial memory snapshot
         self.track_peak_memory()
@@ -1827,6 +2415,23 @@ class PerformanceMetrics:
         print(f"Maximum queue size: {self.max_queue_size}")
         print(f"Solution length: {self.solution_length} moves")
         print(f"Maximum depth reached: {self.max_depth_reached}")
+        if self.pruned_moves:
+            pruned = ", ".join(
+                f"{rule} {count}" for rule, count in sorted(self.pruned_moves.items())
+            )
+            print(f"Moves pruned: {pruned}")
+        if self.dead_ends:
+            dead_ends = ", ".join(
+                f"{rule} {count}" for rule, count in sorted(self.dead_ends.items())
+            )
+            print(f"Dead ends: {dead_ends}")
+        if self.states_reclaimed:
+            print(
+                f"States reclaimed: {self.states_reclaimed} "
+                f"({self.memory_reclaimed:.2f} MB)"
+            )
+        if self.optimality_proven is not None:
+            print(f"Optimality proven: {'yes' if self.optimality_proven else 'no'}")
 
         # Get platform-specific peak memory usage
         system = platform.system()
@@ -1847,10 +2452,136 @@ class PerformanceMetrics:
         print(f"Peak memory usage: {self.max_memory:.2f} MB")
         print("=" * 50)
 
+    def summary(self):
+        """
+        Returns the search counters as a plain dictionary, so they can be sent
+        between processes or stored next to a result.
+
+        Returns:
+            dict: The counters listed in `SUMMARY_FIELDS` and their current values.
+        """
+        return {field: getattr(self, field) for field in self.SUMMARY_FIELDS}
+
+    def load_summary(self, summary):
+        """
+        Copies counters produced by `summary()` (possibly in another process) into
+        this metrics object.
+
+        Args:
+            summary (dict): Counter names and values as returned by `summary()`.
+        """
+        for field, value in summary.items():
+            setattr(self, field, value)
+
+
+CARD_SUITS = {"♥": "H", "♦": "D", "♣": "C", "♠": "S"}  # Deal file suit symbols
+CARD_RANKS = {"A": 1, "J": 11, "Q": 12, "K": 13}
+CARD_RANKS.update((str(rank), rank) for rank in range(2, 11))
+
+
+def parse_game_text(content):
+    """
+    Builds a game from the text of a deal file: one row per line, the cards of
+    the row separated by tabs, each a rank (A, 2-10, J, Q, K) and a suit symbol.
+
+    Args:
+        content (str): The file contents.
+
+    Returns:
+        FreeCellGame: The dealt game, with `deck_size` set to the number of cards.
+
+    Raises:
+        ValueError: If a card has an invalid rank or suit.
+    """
+    game = FreeCellGame(deal=False)
+    count = 0
+    for row in content.split("\n"):
+        cards = [card.strip() for card in row.split("\t") if card.strip()]
+        for col_idx, card_str in enumerate(cards[:8]):
+            suit = CARD_SUITS.get(card_str[-1])
+            if not suit:
+                raise ValueError(f"Invalid suit in card: {card_str}")
+            rank = CARD_RANKS.get(card_str[:-1])
+            if not rank:
+                raise ValueError(f"Invalid rank in card: {card_str}")
+            game.cascades[col_idx].append(Card(suit, rank))
+            count += 1
+    game.deck_size = count
+    return game
+
+
+# Numbered deals use the linear congruential shuffle of the original Microsoft
+# FreeCell. Its card numbers run rank-major in club, diamond, heart, spade order.
+DEAL_SUITS = "CDHS"
+MAX_DEAL_NUMBER = 2**31 - 1
+DEAL_CARD_INDEX = [SUITS.index(DEAL_SUITS[c % 4]) * 13 + c // 4 for c in range(52)]
+DEAL_CODES = [(k % 8) * 25 + k // 8 for k in range(52)]  # pack() code of each slot
+
+
+def deal_order(game_number):
+    """
+    Returns the cards of numbered deal `game_number` (1 to MAX_DEAL_NUMBER) as
+    card numbers (see `Card.to_index`) in dealing order: the k-th card goes to
+    cascade k % 8, row k // 8.
+    """
+    if not 1 <= game_number <= MAX_DEAL_NUMBER:
+        raise ValueError(f"Deal numbers run from 1 to {MAX_DEAL_NUMBER}")
+    cards = list(range(51, -1, -1))
+    seed = game_number
+    for i in range(52):
+        seed = (seed * 214013 + 2531011) & 0x7FFFFFFF
+        j = 51 - (seed >> 16) % (52 - i)
+        cards[i], cards[j] = cards[j], cards[i]
+    return [DEAL_CARD_INDEX[card] for card in cards]
+
+
+def deal_game(game_number):
+    """Returns numbered deal `game_number` as a new game."""
+    game = FreeCellGame(deal=False)
+    for k, index in enumerate(deal_order(game_number)):
+        game.cascades[k % 8].append(Card.from_index(index))
+    return game
+
+
+def generate_deals(start, stop):
+    """
+    Generates the numbered deals start to stop - 1 as packed states (see
+    `FreeCellGame.pack`), for write_deal_corpus() or FreeCellGame.unpack().
+    With NumPy the whole range is shuffled at once, one step per card for
+    every deal, instead of deal by deal.
+
+    Returns:
+        list: (number, packed state) pairs.
+    """
+    if not 1 <= start <= stop - 1 <= MAX_DEAL_NUMBER:
+        raise ValueError(f"Deal numbers run from 1 to {MAX_DEAL_NUMBER}")
+    if np is None:
+        deals = []
+        for number in range(start, stop):
+            packed = bytearray(52)
+            for code, index in zip(DEAL_CODES, deal_order(number)):
+                packed[index] = code
+            deals.append((number, bytes(packed)))
+        return deals
+    count = stop - start
+    rows = np.arange(count)
+    seeds = np.arange(start, stop, dtype=np.int64)
+    cards = np.tile(np.arange(51, -1, -1, dtype=np.int64), (count, 1))
+    for i in range(52):
+        seeds = (seeds * 214013 + 2531011) & 0x7FFFFFFF
+        j = 51 - (seeds >> 16) % (52 - i)
+        swapped = cards[rows, j]
+        cards[rows, j] = cards[:, i]
+        cards[:, i] = swapped
+    packed = np.empty((count, 52), dtype=np.uint8)
+    packed[rows[:, None], np.array(DEAL_CARD_INDEX)[cards]] = DEAL_CODES
+    return list(zip(range(start, stop), map(bytes, packed)))
+
 
 def load_game_from_file(game_number):
     """
-    Loads a FreeCell game from a file.
+    Loads a FreeCell game from a file, or deals it with deal_game() when there
+    is no file for that number.
 
     Args:
         game_number (int): The game number to load. The file path is expected to be
@@ -1866,41 +2597,11 @@ def load_game_from_file(game_number):
     global current_game_number
     try:
         file_path = f"games/game{game_number}.txt"
-        with open(file_path, "r", encoding="utf-8") as file:
-            content = file.read()
-
-        game = FreeCellGame()
-        game.cascades = [[] for _ in range(8)]
-        game.free_cells = [None] * 4
-        game.foundations = {"H": [], "D": [], "C": [], "S": []}
-
-        rows = [row.strip() for row in content.split("\n") if row.strip()]
-        for row_idx, row in enumerate(rows):
-            cards = [card.strip() for card in row.split("\t") if card.strip()]
-            for col_idx, card_str in enumerate(cards):
-                if col_idx >= 8:
-                    break
-                if len(card_str) >= 3 and card_str[:2] == "10":
-                    rank = 10
-                    suit_char = card_str[2]
-                else:
-                    rank_char = card_str[0]
-                    suit_char = card_str[1]
-                    if rank_char == "A":
-                        rank = 1
-                    elif rank_char == "J":
-                        rank = 11
-                    elif rank_char == "Q":
-                        rank = 12
-                    elif rank_char == "K":
-                        rank = 13
-                    else:
-                        rank = int(rank_char)
-                suit_map = {"♥": "H", "♦": "D", "♣": "C", "♠": "S"}
-                suit = suit_map.get(suit_char)
-                if not suit:
-                    raise ValueError(f"Invalid suit in card: {card_str}")
-                game.cascades[col_idx].append(Card(suit, rank))
+        if os.path.exists(file_path):
+            with open(file_path, "r", encoding="utf-8") as file:
+                game = parse_game_text(file.read())
+        else:
+            game = deal_game(int(game_number))
 
         print(f"Successfully loaded game {game_number}")
         current_game_number = game_number
@@ -1910,6 +2611,95 @@ def load_game_from_file(game_number):
         return None
 
 
+class DealCorpus:
+    """
+    A collection of numbered deals read from a file written by
+    write_deal_corpus().
+
+    File layout (native byte order): the magic b"FCDC" and the number of deals
+    as a 32-bit integer; the sorted deal numbers, 32 bits each, which form the
+    index; then one 52-byte packed state (see `FreeCellGame.pack`) per deal,
+    in the same order. The file is memory-mapped, so opening it costs nothing
+    and a deal is read from offset 8 + 4 * count + 52 * position.
+    """
+
+    MAGIC = b"FCDC"
+
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            self._memory = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._memory[:4] != self.MAGIC:
+            raise ValueError(f"{path} is not a deal corpus")
+        (count,) = array("I", self._memory[4:8])
+        self.numbers = memoryview(self._memory)[8 : 8 + 4 * count].cast("I")
+        self._states = 8 + 4 * count
+
+    def __len__(self):
+        return len(self.numbers)
+
+    def __contains__(self, number):
+        return self.position(number) is not None
+
+    def position(self, number):
+        """Returns the position of a deal in the file, or None if it is missing."""
+        position = bisect_left(self.numbers, number)
+        if position == len(self.numbers) or self.numbers[position] != number:
+            return None
+        return position
+
+    def packed(self, position):
+        """Returns the packed state of the deal at `position`."""
+        start = self._states + 52 * position
+        return self._memory[start : start + 52]
+
+    def load(self, number):
+        """Returns the deal with the given number, or None if it is missing."""
+        position = self.position(number)
+        return None if position is None else FreeCellGame.unpack(self.packed(position))
+
+    def __iter__(self):
+        """Yields (number, game) for every deal, in number order."""
+        for position, number in enumerate(self.numbers):
+            yield number, FreeCellGame.unpack(self.packed(position))
+
+
+def write_deal_corpus(path, deals):
+    """
+    Writes numbered deals to a corpus file (see DealCorpus).
+
+    Args:
+        path (str): The file to write.
+        deals (iterable): (number, FreeCellGame or packed state) pairs, in any
+            order; a later deal replaces an earlier one with the same number.
+    """
+    packed = {}
+    for number, game in deals:
+        packed[number] = game if isinstance(game, bytes) else game.pack()
+    numbers = sorted(packed)
+    with open(path, "wb") as file:
+        file.write(DealCorpus.MAGIC + array("I", [len(numbers)]).tobytes())
+        file.write(array("I", numbers).tobytes())
+        for number in numbers:
+            file.write(packed[number])
+    print(f"Wrote {len(numbers)} deals to {path}")
+
+
+def convert_game_files(path, directory="games"):
+    """
+    Collects the deal files of `directory` (game{n}.txt, as read by
+    load_game_from_file) into a corpus file at `path`.
+    """
+
+    def deals():
+        for name in os.listdir(directory):
+            number = name[4:-4]
+            if name.startswith("game") and name.endswith(".txt") and number.isdigit():
+                with open(os.path.join(directory, name), encoding="utf-8") as file:
+                    yield int(number), parse_game_text(file.read())
+
+    write_deal_corpus(path, deals())
+
+
 def save_solution_to_file(
     game_number, solution, metrics, current_algorithm, initial_game=None
 ):
@@ -2006,6 +2796,87 @@ def save_solution_to_file(
         return False
 
 
+NO_SLEEP = frozenset()  # Sleep set of a state with nothing to skip
+
+
+def inverse_move(move):
+    """
+    Returns the move that puts the card(s) moved by `move` back where they came
+    from, or None for foundation moves, which are never undone. For a card taken
+    out of a free cell, the inverse sends it back to that cell; get_search_moves
+    treats a move to any free cell as the same reversal.
+    """
+    move_type, source_type, source_idx, dest = move[:4]
+    if move_type == "foundation":
+        return None
+    if move_type == "supermove":
+        return ("supermove", "cascade", dest, source_idx, move[4])
+    return (source_type, move_type, dest, source_idx)
+
+
+def _move_locations(move):
+    """
+    Returns the piles a single-card move reads or changes, or None for moves
+    whose legality depends on more of the board (supermoves depend on the
+    number of free spaces, free cell moves on which cells are empty) and for
+    dig-out macro moves.
+    """
+    move_type, source_type, source_idx, dest = move[:4]
+    if move_type not in ("cascade", "foundation") or source_type == "free_cell":
+        return None
+    return {("cascade", source_idx), (move_type, dest)}
+
+
+def moves_commute(first, second):
+    """
+    Checks whether two single-card moves touch disjoint piles, so that each
+    stays legal after the other and both orders reach the same state.
+    """
+    first_locations = _move_locations(first)
+    second_locations = _move_locations(second)
+    return (
+        first_locations is not None
+        and second_locations is not None
+        and not first_locations & second_locations
+    )
+
+
+def sleep_set_moves(search_moves, sleep, pruned=None):
+    """
+    Sleep-set reduction over the moves of one expanded state. Moves in `sleep`
+    were already tried, in the other order, from an ancestor, and are skipped.
+    Every other move is paired with its child's sleep set: the sleeping moves
+    and the earlier siblings that commute with it (see `moves_commute`). So of
+    the interleavings of independent moves, only the one in move order is
+    generated, however far apart the moves are on the path.
+
+    Does nothing unless `sleep_sets_enabled` is set, or when auto-moves are on:
+    their extra foundation moves can change the moves that commute.
+
+    Args:
+        search_moves (list): The moves from `get_search_moves`, in order.
+        sleep (frozenset): The sleep set of the expanded state.
+        pruned (Counter, optional): Counts skipped moves under "sleep_set".
+
+    Returns:
+        list: (move, child sleep set) pairs for the moves to expand.
+    """
+    if not sleep_sets_enabled or auto_moves_enabled:
+        return [(move, NO_SLEEP) for move in search_moves]
+    tried = set(sleep)
+    expanded = []
+    for move in search_moves:
+        if move in sleep:
+            if pruned is not None:
+                pruned["sleep_set"] += 1
+            continue
+        expanded.append(
+            (move, frozenset(other for other in tried if moves_commute(other, move)))
+        )
+        tried.add(move)
+    return expanded
+
+
 def format_move(move):
     """
     Formats a move into a human-readable string.
@@ -2040,264 +2911,1500 @@ def format_move(move):
         return f"Move card from {source_desc} to Cascade {dest + 1}"
 
 
-def solve_freecell_astar(game):
+def parse_move(text):
     """
-    Solves FreeCell using A* search with heuristic1. Returns solution moves
-    and performance metrics, or (None, metrics) if no solution found within
-    500,000 states.
+    Reads a move back from the text written by `format_move`, with or without
+    the "Move N: " prefix of solution files.
+
+    Returns:
+        tuple: The move.
     """
-    metrics = PerformanceMetrics()
-    metrics.start()
-    queue = [(game.heuristic1(), id(game), game, [])]
-    heapq.heapify(queue)
-    visited = {hash(game)}
-    max_states = 500000
-    metrics.states_explored = metrics.states_generated = metrics.max_queue_size = 1
+    source, dest = text.split(": ", 1)[-1].split(" to ")
+    source_idx = int(source.split()[-1]) - 1
+    if source.split()[1] != "card":  # Move N cards from Cascade S to Cascade D
+        count = int(source.split()[1])
+        return ("supermove", "cascade", source_idx, int(dest.split()[-1]) - 1, count)
+    source_type = "free_cell" if "Free Cell" in source else "cascade"
+    if dest.endswith("Foundation"):
+        return ("foundation", source_type, source_idx, dest.split()[0])
+    move_type = "free_cell" if dest.startswith("Free Cell") else "cascade"
+    return (move_type, source_type, source_idx, int(dest.split()[-1]) - 1)
+
+
+# 16-bit move codes: bits 0-1 the move type (MOVE_TYPES), bit 2 the source type
+# (SOURCE_TYPES), bits 3-5 the source index, bits 6-8 the destination (cascade,
+# free cell or SUITS index) and bits 9-12 the number of cards moved
+MOVE_TYPES = ("foundation", "free_cell", "cascade", "supermove")
+SOURCE_TYPES = ("cascade", "free_cell")
+MOVE_TYPE_CODES = {move_type: code for code, move_type in enumerate(MOVE_TYPES)}
+SOURCE_TYPE_CODES = {source: code << 2 for code, source in enumerate(SOURCE_TYPES)}
+SUIT_CODES = {suit: code for code, suit in enumerate(SUITS)}
+SOLUTION_MAGIC = b"FCSL"
+
+
+def encode_move(move):
+    """
+    Packs a move into a 16-bit code. Dig-out macro moves have no code; the
+    ordinary moves they stand for do.
 
-    while queue and metrics.states_explored < max_states:
-        _, _, current_game, moves = heapq.heappop(queue)
-        metrics.states_explored += 1
-        metrics.max_depth_reached = max(metrics.max_depth_reached, len(moves))
-        if current_game.is_solved():
-            metrics.stop(moves)
-            return moves, metrics
-        for move in current_game.get_valid_moves():
-            new_game = FreeCellGame(current_game)
-            new_game.make_move(move)
-            metrics.states_generated += 1
-            new_hash = hash(new_game)
-            if new_hash in visited:
-                continue
-            heapq.heappush(
-                queue,
-                (
-                    new_game.heuristic1() + len(moves) + 1,
-                    id(new_game),
-                    new_game,
-                    moves + [move],
-                ),
+    Args:
+        move (tuple): A foundation, free cell, cascade or supermove move.
+
+    Returns:
+        int: The move code.
+    """
+    move_type = move[0]
+    if move_type not in MOVE_TYPE_CODES:
+        raise ValueError(f"{move_type} moves have no 16-bit code")
+    dest = SUIT_CODES[move[3]] if move_type == "foundation" else move[3]
+    count = move[4] if move_type == "supermove" else 1
+    return (
+        MOVE_TYPE_CODES[move_type]
+        | SOURCE_TYPE_CODES[move[1]]
+        | move[2] << 3
+        | dest << 6
+        | count << 9
+    )
+
+
+def decode_move(code):
+    """Rebuilds the move tuple packed by `encode_move`."""
+    move_type = MOVE_TYPES[code & 3]
+    dest = code >> 6 & 7
+    if move_type == "foundation":
+        dest = SUITS[dest]
+    move = (move_type, SOURCE_TYPES[code >> 2 & 1], code >> 3 & 7, dest)
+    if move_type == "supermove":
+        move += (code >> 9,)
+    return move
+
+
+def encode_moves(moves):
+    """Returns the codes of a list of moves as an array of 16-bit integers."""
+    return array("H", [encode_move(move) for move in moves])
+
+
+def decode_moves(codes):
+    """Returns the move tuples of a sequence of move codes."""
+    return [decode_move(code) for code in codes]
+
+
+def write_solution_file(path, game, moves):
+    """
+    Writes a solution in binary form: the magic b"FCSL", the packed initial
+    state (see `FreeCellGame.pack`), the number of moves as a 32-bit integer
+    and one 16-bit code per move (see `encode_move`), in native byte order.
+    A 100-move solution takes 260 bytes.
+
+    Args:
+        path (str): The file to write.
+        game (FreeCellGame): The state the solution starts from.
+        moves (list): The solution moves.
+    """
+    with open(path, "wb") as file:
+        file.write(SOLUTION_MAGIC + game.pack())
+        file.write(array("I", [len(moves)]).tobytes())
+        file.write(encode_moves(moves).tobytes())
+
+
+def read_solution_file(path):
+    """
+    Reads a solution written by `write_solution_file`.
+
+    Returns:
+        tuple: The initial state (FreeCellGame) and the list of move tuples.
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    if data[:4] != SOLUTION_MAGIC:
+        raise ValueError(f"{path} is not a binary solution file")
+    (count,) = array("I", data[56:60])
+    codes = array("H", data[60 : 60 + 2 * count])
+    return FreeCellGame.unpack(data[4:56]), decode_moves(codes)
+
+
+# Batched heuristic evaluation. encode_states() turns a list of games into one
+# row per state: the location of every card (0-7 cascade, 8-11 free cell,
+# LOCATION_FOUNDATION, LOCATION_ABSENT), its depth in the cascade (-1 outside
+# cascades) and the foundation rank of each suit, in SUITS order.
+LOCATION_FOUNDATION = 12
+LOCATION_ABSENT = 13
+
+if np is not None:
+    _RANKS = np.arange(52) % 13 + 1
+    _SUIT_OF = np.arange(52) // 13
+    _IS_RED = np.isin(_SUIT_OF, [SUITS.index("H"), SUITS.index("D")])
+    # heuristic3 processes cards ordered by (suit letter, rank)
+    _SORT_KEY = (
+        np.array([sorted(SUITS).index(SUITS[s]) for s in _SUIT_OF]) * 13 + _RANKS
+    )
+    _SORTS_AFTER = _SORT_KEY[None, :] > _SORT_KEY[:, None]  # [a, b]: b after a
+    # [a, b]: card b can be placed on card a in a cascade
+    _BUILDS_ON = (_RANKS[:, None] == _RANKS[None, :] + 1) & (
+        _IS_RED[:, None] != _IS_RED[None, :]
+    )
+    _META_PAIR_PENALTY = 20 * (_RANKS[:, None] != _RANKS[None, :] + 1) + 10 * (
+        _IS_RED[:, None] == _IS_RED[None, :]
+    )
+
+
+def encode_states(games):
+    """
+    Encodes a batch of game states as an integer array for the batch heuristics.
+
+    Args:
+        games (list): FreeCellGame states.
+
+    Returns:
+        numpy.ndarray: An int16 array of shape (len(games), 108): columns 0-51 hold
+                       the location of each card number, 52-103 its depth in its
+                       cascade and 104-107 the foundation rank of each suit.
+    """
+    packed = np.frombuffer(b"".join(game.pack() for game in games), np.uint8)
+    packed = packed.reshape(len(games), 52).astype(np.int16)
+    in_cascade = packed < FREE_CELL_CODE
+    location = np.where(
+        in_cascade,
+        packed // 25,
+        np.where(
+            packed < FOUNDATION_CODE,
+            8 + packed - FREE_CELL_CODE,
+            np.where(packed == FOUNDATION_CODE, LOCATION_FOUNDATION, LOCATION_ABSENT),
+        ),
+    )
+    depth = np.where(in_cascade, packed % 25, -1)
+    foundation_ranks = (location == LOCATION_FOUNDATION).reshape(-1, 4, 13).sum(axis=2)
+    return np.concatenate([location, depth, foundation_ranks], axis=1).astype(np.int16)
+
+
+def _decode_batch(encoded):
+    location = encoded[:, :52]
+    depth = encoded[:, 52:104]
+    foundation_ranks = encoded[:, 104:108].astype(np.int64)
+    in_cascade = location < 8
+    # [state, a, b]: card b lies directly on card a in the same cascade
+    on_top_of = (
+        in_cascade[:, :, None]
+        & in_cascade[:, None, :]
+        & (location[:, :, None] == location[:, None, :])
+        & (depth[:, None, :] == depth[:, :, None] + 1)
+    )
+    return location, depth, foundation_ranks, in_cascade, on_top_of
+
+
+def batch_heuristic1(encoded):
+    """Vectorized `FreeCellGame.heuristic1` over the rows of `encode_states()`."""
+    return 52 - encoded[:, 104:108].astype(np.int64).sum(axis=1)
+
+
+def batch_heuristic2(encoded):
+    """Vectorized `FreeCellGame.heuristic2` over the rows of `encode_states()`."""
+    location = encoded[:, :52]
+    on_board = location < LOCATION_FOUNDATION
+    missing_below = _RANKS[None, :] - 1 - encoded[:, 104:108][:, _SUIT_OF]
+    return (np.maximum(1, missing_below) * on_board).sum(axis=1)
+
+
+def batch_heuristic3(encoded):
+    """
+    Vectorized `FreeCellGame.heuristic3` over the rows of `encode_states()`.
+
+    Every card left on the board is the next one needed for its suit once the
+    lower cards of that suit are counted as moved, so each card costs one move
+    plus the cards above it in its cascade that sort after it by (suit, rank).
+    """
+    location, depth, _, in_cascade, _ = _decode_batch(encoded)
+    above = (
+        in_cascade[:, :, None]
+        & in_cascade[:, None, :]
+        & (location[:, :, None] == location[:, None, :])
+        & (depth[:, None, :] > depth[:, :, None])
+    )
+    blockers = (above & _SORTS_AFTER[None]).sum(axis=(1, 2))
+    return (location < LOCATION_FOUNDATION).sum(axis=1) + blockers
+
+
+def batch_meta_heuristic(encoded):
+    """Vectorized `FreeCellGame.meta_heuristic` over the rows of `encode_states()`."""
+    location, _, foundation_ranks, in_cascade, on_top_of = _decode_batch(encoded)
+    occupied_free_cells = ((location >= 8) & (location < LOCATION_FOUNDATION)).sum(1)
+    score = ((13 - foundation_ranks) * 50).sum(axis=1) + occupied_free_cells * 100
+    score += (on_top_of * _META_PAIR_PENALTY[None]).sum(axis=(1, 2))
+
+    # Mobility penalty: cascade tops that can go neither to a foundation nor
+    # to another cascade, plus the occupied free cells
+    is_top = in_cascade & ~on_top_of.any(axis=2)
+    to_foundation = foundation_ranks[:, _SUIT_OF] == _RANKS[None, :] - 1
+    used_cascades = np.zeros((len(encoded), 9), dtype=bool)
+    np.put_along_axis(used_cascades, np.where(in_cascade, location, 8), True, axis=1)
+    has_empty_cascade = used_cascades[:, :8].sum(axis=1) < 8
+    to_cascade = (is_top[:, None, :] & _BUILDS_ON.T[None]).any(axis=2)
+    stuck = is_top & ~to_foundation & ~to_cascade & ~has_empty_cascade[:, None]
+    return score + stuck.sum(axis=1) * 50 + occupied_free_cells * 50
+
+
+def batch_meta_heuristic2(encoded):
+    """Vectorized `FreeCellGame.meta_heuristic2` over the rows of `encode_states()`."""
+    location, _, foundation_ranks, _, on_top_of = _decode_batch(encoded)
+    occupied_free_cells = ((location >= 8) & (location < LOCATION_FOUNDATION)).sum(1)
+    out_of_sequence = (on_top_of & ~_BUILDS_ON[None]).sum(axis=(1, 2))
+    return (
+        -10 * foundation_ranks.sum(axis=1) + 5 * occupied_free_cells + out_of_sequence
+    )
+
+
+BATCH_HEURISTICS = {
+    "heuristic1": batch_heuristic1,
+    "heuristic2": batch_heuristic2,
+    "heuristic3": batch_heuristic3,
+    "meta_heuristic": batch_meta_heuristic,
+    "meta_heuristic2": batch_meta_heuristic2,
+}
+
+
+class EndgameTablebase:
+    """
+    Exact distance to solve, in moves, of every position with at most
+    `max_cards` cards outside the foundations, read from a file written by
+    build_endgame_tablebase().
+
+    File layout (native byte order): the magic b"FCTB", then deck size,
+    max_cards and the number of positions as 32-bit integers; the sorted 64-bit
+    position keys (see `key()`); one distance byte per key, UNSOLVABLE for
+    positions that cannot be solved. The file is memory-mapped and searched in
+    place, so opening it costs nothing until positions are looked up.
+    """
+
+    MAGIC = b"FCTB"
+    UNSOLVABLE = 255
+
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            self._memory = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._memory[:4] != self.MAGIC:
+            raise ValueError(f"{path} is not an endgame tablebase")
+        self.deck_size, self.max_cards, count = array("I", self._memory[4:16])
+        self._keys = memoryview(self._memory)[16 : 16 + 8 * count].cast("Q")
+        self._distances = memoryview(self._memory)[16 + 8 * count :]
+
+    @staticmethod
+    def key(game):
+        """
+        Returns the 64-bit key of a position. Free cells and cascades are sorted
+        first, since their order does not change the distance; the foundations
+        follow from the cards left.
+        """
+        cells = sorted(card.to_index() for card in game.free_cells if card)
+        cascades = sorted(
+            bytes(card.to_index() for card in cascade)
+            for cascade in game.cascades
+            if cascade
+        )
+        data = bytes(cells) + b"\xff" + b"\xfe".join(cascades)
+        return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+    def covers(self, game):
+        """Checks whether the table holds the position's distance."""
+        return (
+            game.deck_size == self.deck_size
+            and game.deck_size - game.foundation_count() <= self.max_cards
+        )
+
+    def distance(self, game):
+        """
+        Returns the number of moves needed to solve the position, UNSOLVABLE if
+        it cannot be solved, or None if the table does not hold it.
+        """
+        if not self.covers(game):
+            return None
+        key = self.key(game)
+        index = bisect_left(self._keys, key)
+        if index == len(self._keys) or self._keys[index] != key:
+            return None
+        return self._distances[index]
+
+    def solve(self, game):
+        """
+        Returns a shortest solution of the position, found by following moves
+        that lower the distance by one, or None if the position cannot be
+        solved or is not in the table.
+        """
+        distance = self.distance(game)
+        if distance is None or distance == self.UNSOLVABLE:
+            return None
+        moves = []
+        while distance:
+            for move in game.get_valid_moves():
+                child = FreeCellGame(game)
+                child.make_move(move)
+                if self.distance(child) == distance - 1:
+                    moves.append(move)
+                    game, distance = child, distance - 1
+                    break
+            else:
+                return None  # Table built with different move rules
+        return moves
+
+
+_endgame_tablebase = None
+
+
+def get_endgame_tablebase():
+    """
+    Returns the endgame tablebase at ENDGAME_TABLEBASE_PATH, opened on first
+    use, or None when `endgame_tablebase_enabled` is off or the file is missing.
+    """
+    global _endgame_tablebase
+    if not endgame_tablebase_enabled:
+        return None
+    if _endgame_tablebase is None and os.path.exists(ENDGAME_TABLEBASE_PATH):
+        _endgame_tablebase = EndgameTablebase(ENDGAME_TABLEBASE_PATH)
+    return _endgame_tablebase
+
+
+def _relabel_move(move, cascades, cells):
+    """
+    Renumbers the cascades and free cells a move refers to: cascade i becomes
+    cascades[i] and free cell i becomes cells[i].
+    """
+    source = (cascades if move[1] == "cascade" else cells)[move[2]]
+    if move[0] == "foundation":
+        dest = move[3]
+    elif move[0] == "free_cell":
+        dest = cells[move[3]]
+    else:
+        dest = cascades[move[3]]
+    return (move[0], move[1], source, dest) + move[4:]
+
+
+class SolutionDatabase:
+    """
+    Best known distance to a solution of positions met by earlier searches, in
+    a SQLite file. Each solvable position stores its distance and the first
+    move of its best known solution; following the stored moves from position
+    to position replays the whole solution. Proven dead ends store no distance,
+    so any solution found later replaces them, and read back as UNSOLVABLE.
+
+    Positions are keyed like the endgame tablebase, with cascades and free
+    cells sorted, so one entry serves every arrangement of the same cards.
+    Moves are stored with cascades and free cells numbered in that sorted
+    order and renumbered for the position at hand when read back.
+    """
+
+    UNSOLVABLE = -1
+
+    def __init__(self, path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=30)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS positions "
+                "(key INTEGER PRIMARY KEY, distance INTEGER, move INTEGER)"
             )
-            visited.add(new_hash)
-            metrics.max_queue_size = max(metrics.max_queue_size, len(queue))
-    metrics.stop()
-    return None, metrics
+
+    @staticmethod
+    def canonical(game):
+        """
+        Returns the signed 64-bit key of a position, then its cascades and its
+        free cells in key order, as lists of their indices.
+        """
+        codes = [
+            bytes(card.to_index() for card in cascade) for cascade in game.cascades
+        ]
+        cells = [
+            ABSENT_CODE if card is None else card.to_index()
+            for card in game.free_cells
+        ]
+        cascade_order = sorted(range(8), key=codes.__getitem__)
+        cell_order = sorted(range(4), key=cells.__getitem__)
+        data = (
+            bytes(cells[i] for i in cell_order)
+            + b"\xff"
+            + b"\xfe".join(codes[i] for i in cascade_order)
+        )
+        digest = hashlib.blake2b(data, digest_size=8).digest()
+        return int.from_bytes(digest, "little", signed=True), cascade_order, cell_order
+
+    def _entry(self, key):
+        # Always read the file: other processes may have recorded the key
+        entry = self._connection.execute(
+            "SELECT distance, move FROM positions WHERE key = ?", (key,)
+        ).fetchone()
+        if entry is not None and entry[0] is None:
+            return (self.UNSOLVABLE, None)
+        return entry
+
+    def distance(self, game):
+        """
+        Returns the length of the best known solution of the position,
+        UNSOLVABLE for a proven dead end, or None if the position is unknown.
+        """
+        entry = self._entry(self.canonical(game)[0])
+        return None if entry is None else entry[0]
+
+    def solve(self, game):
+        """
+        Returns the best known solution of the position, or None if it is
+        unknown or a dead end. Every stored move is checked against the moves
+        valid in the position, so a stale entry or a key collision gives None
+        rather than a wrong solution.
+        """
+        game = FreeCellGame(game)
+        moves = []
+        while not game.is_solved():
+            key, cascades, cells = self.canonical(game)
+            entry = self._entry(key)
+            if entry is None or entry[0] < 1:
+                return None
+            if moves and entry[0] >= previous_distance:
+                return None  # Entries must lead closer to the solution
+            previous_distance = entry[0]
+            move = _relabel_move(decode_move(entry[1]), cascades, cells)
+            if move[0] == "free_cell":
+                move = move[:3] + (game.free_cells.index(None),)  # Cells are alike
+            if move not in game.get_valid_moves():
+                return None
+            game.make_move(move)
+            moves.append(move)
+        return moves
+
+    def record(self, game, moves):
+        """
+        Records a solution of `game`: every position along it gets the rest of
+        the solution as its distance, unless a shorter one is already known.
+        """
+        game = FreeCellGame(game)
+        entries = []
+        for i, move in enumerate(moves):
+            key, cascades, cells = self.canonical(game)
+            slots = (
+                [cascades.index(index) for index in range(8)],
+                [cells.index(index) for index in range(4)],
+            )
+            canonical_move = _relabel_move(move, *slots)
+            entries.append((key, len(moves) - i, encode_move(canonical_move)))
+            game.make_move(move)
+        self._store(entries)
+
+    def record_dead_end(self, game):
+        """Records that the position has been proven unsolvable."""
+        with self._connection:
+            self._connection.execute(
+                "INSERT INTO positions VALUES (?, NULL, NULL) "
+                "ON CONFLICT (key) DO NOTHING",
+                (self.canonical(game)[0],),
+            )
+
+    def _store(self, entries):
+        with self._connection:
+            self._connection.executemany(
+                "INSERT INTO positions VALUES (?, ?, ?) ON CONFLICT (key) DO "
+                "UPDATE SET distance = excluded.distance, move = excluded.move "
+                "WHERE positions.distance IS NULL "
+                "OR excluded.distance < positions.distance",
+                entries,
+            )
+
+
+_solution_database = None
 
 
-def solve_freecell_astar2(game):
+def get_solution_database():
     """
-    Solves FreeCell using A* search with heuristic2. Returns solution moves
-    and performance metrics, or (None, metrics) if no solution found within
-    500,000 states.
+    Returns the solution database at SOLUTION_DATABASE_PATH, opened on first
+    use in each process, or None when `solution_database_enabled` is off.
+    """
+    global _solution_database
+    if not solution_database_enabled:
+        return None
+    if _solution_database is None or _solution_database[0] != os.getpid():
+        # SQLite connections must not be shared with forked worker processes
+        _solution_database = (os.getpid(), SolutionDatabase(SOLUTION_DATABASE_PATH))
+    return _solution_database[1]
+
+
+def _endgame_positions(deck_size, out_cards):
+    """
+    Yields every position of a `deck_size` deck with exactly `out_cards` cards
+    outside the foundations, once per tablebase key.
+    """
+    max_rank = 13 if deck_size == 52 else 7 if deck_size == 28 else 3
+    seen = set()
+    for outs in itertools.product(range(min(out_cards, max_rank) + 1), repeat=4):
+        if sum(outs) != out_cards:
+            continue
+        cards = [
+            Card(suit, rank)
+            for suit, out in zip(SUITS, outs)
+            for rank in range(max_rank - out + 1, max_rank + 1)
+        ]
+        for num_cells in range(min(4, out_cards) + 1):
+            for cells in itertools.combinations(cards, num_cells):
+                rest = [card for card in cards if card not in cells]
+                for order in itertools.permutations(rest):
+                    num_cuts = max(len(rest) - 1, 0)
+                    for cuts in itertools.product((False, True), repeat=num_cuts):
+                        cascades = [[]]
+                        for card, cut in zip(order, (False,) + cuts):
+                            if cut:
+                                cascades.append([])
+                            cascades[-1].append(card)
+                        if len(cascades) > 8:
+                            continue
+                        game = FreeCellGame(deck_size=deck_size, deal=False)
+                        for suit, out in zip(SUITS, outs):
+                            game.foundations[suit] = [
+                                Card(suit, rank)
+                                for rank in range(1, max_rank - out + 1)
+                            ]
+                        for i, cascade in enumerate(cascades if rest else []):
+                            game.cascades[i] = cascade
+                        for i, card in enumerate(cells):
+                            game.free_cells[i] = card
+                        key = EndgameTablebase.key(game)
+                        if key not in seen:
+                            seen.add(key)
+                            yield key, game
+
+
+def _retrograde_pass(layer, predecessors, unsolvable=255):
+    """
+    Finishes a layer of a retrograde analysis in place. `layer` maps every key
+    to its best distance through moves that leave the layer (`unsolvable` if
+    none); `predecessors` maps a key to the keys one in-layer move away from
+    it. Distances are lowered by a shortest-path pass backwards over those
+    moves, shortest first.
+    """
+    buckets = {}
+    for key, distance in layer.items():
+        buckets.setdefault(distance, []).append(key)
+    for distance in range(unsolvable - 1):
+        for key in buckets.pop(distance, []):
+            if layer[key] != distance:
+                continue  # Lowered after it was queued
+            for parent in predecessors.get(key, []):
+                if layer[parent] > distance + 1:
+                    layer[parent] = distance + 1
+                    buckets.setdefault(distance + 1, []).append(parent)
+
+
+def build_endgame_tablebase(path=ENDGAME_TABLEBASE_PATH, max_cards=5, deck_size=52):
+    """
+    Builds the endgame tablebase offline by retrograde analysis and writes it
+    to `path` (see EndgameTablebase for the layout).
+
+    Positions are solved in layers of cards left outside the foundations,
+    from 0 up to max_cards. Foundation moves lead to the layer below, whose
+    distances are known; the other moves stay in the layer. Each layer is
+    finished by a shortest-path pass backwards over its own moves, starting
+    from the positions' best foundation moves.
+
+    Positions per layer grow quickly: about 58,000 at 5 cards and 710,000 at 6
+    for the 52-card deck.
+    """
+    distances = {}
+    for out_cards in range(max_cards + 1):
+        layer = {}
+        predecessors = {}
+        for key, game in _endgame_positions(deck_size, out_cards):
+            best = 0 if game.is_solved() else EndgameTablebase.UNSOLVABLE
+            for move in game.get_valid_moves():
+                child = FreeCellGame(game)
+                child.make_move(move)
+                child_key = EndgameTablebase.key(child)
+                if move[0] != "foundation":
+                    predecessors.setdefault(child_key, []).append(key)
+                elif child_key in distances:
+                    best = min(best, distances[child_key] + 1)
+            layer[key] = best
+        _retrograde_pass(layer, predecessors)
+        distances.update(layer)
+        print(f"Tablebase: {len(layer)} positions with {out_cards} cards left")
+
+    keys = sorted(distances)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(EndgameTablebase.MAGIC)
+        array("I", [deck_size, max_cards, len(keys)]).tofile(file)
+        array("Q", keys).tofile(file)
+        file.write(bytes(distances[key] for key in keys))
+
+
+class PatternDatabase:
+    """
+    Per-suit pattern database, read from a file written by
+    build_pattern_database().
+
+    The abstraction of a state keeps, for one suit, only the next `window`
+    cards its foundation needs (labelled 1, 2, ... by rank above the
+    foundation) and forgets every other card. Its states were solved
+    exhaustively under relaxed moves: any stack of these cards may be put on
+    any other or on a new cascade, and the suit has all four free cells to
+    itself. The stored distance is therefore the fewest moves the window could
+    need if the other suits were out of the way.
+
+    File layout (native byte order): the magic b"FCPD", then the window and
+    the number of abstract states as 32-bit integers; the sorted 32-bit state
+    keys (see pattern_key()); one distance byte per key. Like
+    EndgameTablebase, the file is memory-mapped and searched in place.
+    """
+
+    MAGIC = b"FCPD"
+
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            self._memory = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._memory[:4] != self.MAGIC:
+            raise ValueError(f"{path} is not a pattern database")
+        self.window, count = array("I", self._memory[4:12])
+        self._keys = memoryview(self._memory)[12 : 12 + 4 * count].cast("I")
+        self._distances = memoryview(self._memory)[12 + 4 * count :]
+
+    def evaluate(self, game):
+        """
+        Returns the sum over the suits of the window's distance, plus one
+        foundation move for every card of the suit beyond the window, plus one
+        move for every other card that covers a window card in its cascade.
+        """
+        locations = game.card_locations()
+        max_rank = 13 if game.deck_size == 52 else 7 if game.deck_size == 28 else 3
+        total = 0
+        lowest = [None] * 8  # Depth of the lowest window card of each cascade
+        for s, suit in enumerate(SUITS):
+            done = len(game.foundations[suit])
+            size = min(self.window, max_rank - done)
+            first = s * 13 + done
+            # Codes sort by cascade, then depth (see FreeCellGame.pack)
+            stacked = sorted(
+                (code, label)
+                for label, code in enumerate(locations[first : first + size], 1)
+                if code < FREE_CELL_CODE
+            )
+            parents = [0] * size  # Free cell cards keep 0
+            below = None
+            for code, label in stacked:
+                cascade, depth = divmod(code, 25)
+                if below and below[0] == cascade:
+                    parents[label - 1] = below[1] + 1
+                else:
+                    parents[label - 1] = 1
+                    if lowest[cascade] is None or depth < lowest[cascade]:
+                        lowest[cascade] = depth
+                below = (cascade, label)
+            key = pattern_key(parents, self.window)
+            total += self._distances[bisect_left(self._keys, key)]
+            total += max_rank - done - size - len(stacked)
+        for cascade, depth in enumerate(lowest):
+            if depth is not None:
+                total += len(game.cascades[cascade]) - depth
+        return total
+
+
+def pattern_key(parents, window):
+    """
+    Returns the key of an abstract pattern state. `parents` holds, for cards
+    1..n of the window, 0 if the card is in a free cell, 1 if it lies lowest
+    of the window's cards in its cascade, or 1 + the label of the window card
+    directly below it. This names the state without numbering the cascades,
+    so states that only differ in cascade order share a key.
+    """
+    key = len(parents)
+    for parent in parents:
+        key = key * (window + 2) + parent
+    return key
+
+
+def _pattern_state_key(cells, stacks, window):
+    """Returns pattern_key() of an abstract state given as labels."""
+    parents = [0] * (len(cells) + sum(len(stack) for stack in stacks))
+    for stack in stacks:
+        for lower, card in zip((None,) + stack, stack):
+            parents[card - 1] = 1 if lower is None else lower + 1
+    return pattern_key(parents, window)
+
+
+def _pattern_stacks(labels):
+    """Yields every way to lay `labels` out as unordered cascades (stacks)."""
+    if not labels:
+        yield ()
+        return
+    for stacks in _pattern_stacks(labels[:-1]):
+        card = labels[-1]
+        yield stacks + ((card,),)
+        for i, stack in enumerate(stacks):
+            for position in range(len(stack) + 1):
+                grown = stack[:position] + (card,) + stack[position:]
+                yield stacks[:i] + (grown,) + stacks[i + 1 :]
+
+
+def _pattern_moves(cells, stacks):
+    """
+    Yields (cells, stacks, to_foundation) for every relaxed move of an
+    abstract state. Cards move one at a time, or several together when each
+    lies on a card two, four, ... ranks higher, as the suit's cards of a real
+    sequence do.
+    """
+    if 1 in cells or any(stack[-1] == 1 for stack in stacks):
+        yield (
+            tuple(card - 1 for card in cells if card != 1),
+            tuple(
+                tuple(card - 1 for card in stack if card != 1)
+                for stack in stacks
+                if stack != (1,)
+            ),
+            True,
+        )
+    for i, stack in enumerate(stacks):
+        others = stacks[:i] + stacks[i + 1 :]
+        if len(cells) < 4:
+            yield cells + stack[-1:], others + ((stack[:-1],) if stack[:-1] else ()), False
+        for count in range(1, len(stack) + 1):
+            gap = stack[-count] - stack[-count + 1] if count > 1 else 2
+            if gap <= 0 or gap % 2:
+                break
+            moved, left = stack[-count:], stack[:-count]
+            rest = (left,) if left else ()
+            if left:
+                yield cells, others + rest + (moved,), False
+            for j, other in enumerate(others):
+                yield cells, others[:j] + (other + moved,) + others[j + 1 :] + rest, False
+    for card in cells:
+        rest = tuple(other for other in cells if other != card)
+        yield rest, stacks + ((card,),), False
+        for j, stack in enumerate(stacks):
+            yield rest, stacks[:j] + (stack + (card,),) + stacks[j + 1 :], False
+
+
+def build_pattern_database(path=PATTERN_DATABASE_PATH, window=6):
+    """
+    Builds the pattern database offline and writes it to `path` (see
+    PatternDatabase for the abstraction and layout). Abstract states are
+    solved in layers of window cards left, by retrograde analysis as in
+    build_endgame_tablebase(). The window is at most 8 so keys fit 32 bits;
+    the default of 6 gives about 9,700 abstract states, 7 about 89,000.
+    """
+    distances = {0: 0}
+    for size in range(1, window + 1):
+        layer = {}
+        predecessors = {}
+        labels = tuple(range(1, size + 1))
+        for num_cells in range(min(4, size) + 1):
+            for cells in itertools.combinations(labels, num_cells):
+                rest = tuple(card for card in labels if card not in cells)
+                for stacks in _pattern_stacks(rest):
+                    key = _pattern_state_key(cells, stacks, window)
+                    best = EndgameTablebase.UNSOLVABLE
+                    for child_cells, child_stacks, to_foundation in _pattern_moves(
+                        cells, stacks
+                    ):
+                        child_key = _pattern_state_key(child_cells, child_stacks, window)
+                        if to_foundation:
+                            best = min(best, distances[child_key] + 1)
+                        else:
+                            predecessors.setdefault(child_key, []).append(key)
+                    layer[key] = best
+        _retrograde_pass(layer, predecessors)
+        distances.update(layer)
+        print(f"Pattern database: {len(layer)} states with {size} cards left")
+
+    keys = sorted(distances)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Written under a temporary name, since solver processes may build at once
+    temporary = f"{path}.{os.getpid()}"
+    with open(temporary, "wb") as file:
+        file.write(PatternDatabase.MAGIC)
+        array("I", [window, len(keys)]).tofile(file)
+        array("I", keys).tofile(file)
+        file.write(bytes(distances[key] for key in keys))
+    os.replace(temporary, path)
+
+
+_pattern_database = None
+
+
+def get_pattern_database():
+    """
+    Returns the pattern database at PATTERN_DATABASE_PATH, opened on first
+    use and built first if the file is missing.
+    """
+    global _pattern_database
+    if _pattern_database is None:
+        if not os.path.exists(PATTERN_DATABASE_PATH):
+            build_pattern_database(PATTERN_DATABASE_PATH)
+        _pattern_database = PatternDatabase(PATTERN_DATABASE_PATH)
+    return _pattern_database
+
+
+class HeapOpenList:
+    """
+    Open list of the best-first solvers backed by a binary heap. Entries with the
+    lowest priority come out first; ties go to the deepest entry, then to the
+    most recently pushed one.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._count = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, priority, depth, entry):
+        self._count += 1
+        heapq.heappush(self._heap, (priority, -depth, -self._count, entry))
+
+    def pop(self):
+        return heapq.heappop(self._heap)[-1]
+
+    def entries(self):
+        """
+        Returns the entries in reverse pop order, so pushing them into an empty
+        open list in that order restores it.
+        """
+        return [item[-1] for item in sorted(self._heap, reverse=True)]
+
+
+class BucketOpenList:
+    """
+    Open list with one bucket per priority value, in the same order as
+    HeapOpenList. Each bucket holds one stack per depth, so push and pop are O(1)
+    amortized instead of O(log n) tuple comparisons.
+
+    Priorities are mapped to bucket keys with round(priority * resolution). With
+    a resolution that makes every priority an integer (1 for plain A*, 2 for a
+    weight of 1.5) the order is exact; otherwise priorities are quantized.
+    """
+
+    def __init__(self, resolution=1):
+        self.resolution = resolution
+        self._buckets = {}  # key -> list of stacks indexed by depth
+        self._min_key = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def push(self, priority, depth, entry):
+        key = round(priority * self.resolution)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = []
+        if len(bucket) <= depth:
+            bucket.extend([] for _ in range(depth + 1 - len(bucket)))
+        bucket[depth].append(entry)
+        if not self._size or key < self._min_key:
+            self._min_key = key
+        self._size += 1
+
+    def pop(self):
+        if not self._size:
+            raise IndexError("pop from an empty open list")
+        while self._min_key not in self._buckets:
+            self._min_key += 1
+        bucket = self._buckets[self._min_key]
+        entry = bucket[-1].pop()
+        while bucket and not bucket[-1]:
+            bucket.pop()
+        if not bucket:
+            del self._buckets[self._min_key]
+        self._size -= 1
+        return entry
+
+    def entries(self):
+        """
+        Returns the entries in reverse pop order, so pushing them into an empty
+        open list in that order restores it.
+        """
+        return [
+            entry
+            for key in sorted(self._buckets, reverse=True)
+            for stack in self._buckets[key]
+            for entry in stack
+        ]
+
+
+def make_open_list(weight=1):
+    """
+    Returns an empty open list for priorities of the form weight * h + depth:
+    a BucketOpenList when `bucket_open_list_enabled` is set (with a resolution
+    that keeps such priorities exact for weights like 1.5 or 1.25), otherwise a
+    HeapOpenList.
+    """
+    if not bucket_open_list_enabled:
+        return HeapOpenList()
+    return BucketOpenList(Fraction(weight).limit_denominator(100).denominator)
+
+
+class FoundationLayers:
+    """
+    Visited set partitioned by the number of cards on the foundations. Keys are
+    (foundation count, state hash) pairs, as returned by `key()`, so the object
+    can stand in for a plain visited set.
+
+    Cards never leave the foundations during a search, so once every frontier
+    entry has at least k cards up, no state with fewer can be reached again. The
+    search reports the layer of each entry it pushes and pops; `collect()` then
+    drops the layers below the smallest one left on the frontier.
+    """
+
+    def __init__(self):
+        self._layers = {}  # foundation count -> set of state hashes
+        self._frontier = Counter()
+        self._dirty = False
+        self.states_reclaimed = 0
+        self.bytes_reclaimed = 0
+
+    @staticmethod
+    def key(game):
+        return game.foundation_count(), hash(game)
+
+    def __contains__(self, key):
+        layer = self._layers.get(key[0])
+        return layer is not None and key[1] in layer
+
+    def add(self, key):
+        layer = self._layers.get(key[0])
+        if layer is None:
+            layer = self._layers[key[0]] = set()
+        layer.add(key[1])
+
+    def push(self, layer):
+        self._frontier[layer] += 1
+
+    def pop(self, layer):
+        self._frontier[layer] -= 1
+        if not self._frontier[layer]:
+            del self._frontier[layer]
+            self._dirty = True
+
+    def collect(self):
+        """
+        Drops the layers below the lowest foundation count on the frontier. Call
+        it once the children of an expanded entry have been pushed.
+        """
+        if not self._dirty or not self._frontier:
+            return
+        self._dirty = False
+        lowest = min(self._frontier)
+        for count in [count for count in self._layers if count < lowest]:
+            layer = self._layers.pop(count)
+            self.states_reclaimed += len(layer)
+            self.bytes_reclaimed += sys.getsizeof(layer) + sum(
+                sys.getsizeof(state) for state in layer
+            )
+
+    def report(self, metrics):
+        metrics.states_reclaimed = self.states_reclaimed
+        metrics.memory_reclaimed = self.bytes_reclaimed / 1024 / 1024
+
+
+CHECKPOINT_MAGIC = b"FCCP"
+CHECKPOINT_INTERVAL = 120  # Seconds between checkpoints of a best-first search
+
+
+def save_search_checkpoint(path, settings, queue, visited, metrics):
+    """
+    Writes the state of a best-first search to `path`, replacing the previous
+    checkpoint only once the new one is complete.
+
+    File layout: the magic b"FCCP", then a zlib-compressed pickle of a dict
+    with the search settings, the move generation settings (_move_options()),
+    the metrics summary and elapsed time, the visited fingerprints as packed
+    64-bit integers, and the frontier. Frontier states are packed (see
+    `FreeCellGame.pack`); their paths are stored once in a node arena, a
+    parent index and a move code (see `encode_move`) per node, with each entry
+    pointing at the node that ends its path.
+
+    Args:
+        path (str): The checkpoint file.
+        settings (dict): heuristic, weight, use_depth and max_states of the search.
+        queue: The open list, with (game, moves, score, sleep) entries.
+        visited (set): Fingerprints of the states seen so far.
+        metrics (PerformanceMetrics): The counters of the search.
+    """
+    arena_nodes = {}  # (parent index, move) -> node index; node 0 is the root
+    arena_parents = array("i", [-1])
+    arena_moves = array("H", [0])
+    states = []
+    ends = array("i")
+    scores = []
+    sleeps = []
+    for game, moves, score, sleep in queue.entries():
+        node = 0
+        for move in moves:
+            child = arena_nodes.get((node, move))
+            if child is None:
+                child = arena_nodes[node, move] = len(arena_moves)
+                arena_parents.append(node)
+                arena_moves.append(move)
+            node = child
+        states.append(game.pack())
+        ends.append(node)
+        scores.append(score)
+        sleeps.append(tuple(sleep))
+    data = {
+        "settings": settings,
+        "move_options": _move_options(),
+        "metrics": metrics.summary(),
+        "elapsed": time.time() - metrics.start_time,
+        "visited": array("Q", visited).tobytes(),
+        "arena_parents": arena_parents.tobytes(),
+        "arena_moves": arena_moves.tobytes(),
+        "states": b"".join(states),
+        "ends": ends.tobytes(),
+        "scores": scores,
+        "sleeps": sleeps,
+    }
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as file:
+        file.write(CHECKPOINT_MAGIC)
+        file.write(zlib.compress(pickle.dumps(data, pickle.HIGHEST_PROTOCOL)))
+    os.replace(temporary, path)
+
+
+def load_search_checkpoint(path):
+    """
+    Reads a checkpoint written by save_search_checkpoint() back into the
+    search settings, the move generation settings, the metrics summary and
+    elapsed time, the set of visited fingerprints, and the frontier as
+    (game, moves, score, sleep) entries in reverse pop order.
+
+    Returns:
+        dict: The checkpoint contents, with "visited" and "frontier" decoded.
+    """
+    with open(path, "rb") as file:
+        if file.read(4) != CHECKPOINT_MAGIC:
+            raise ValueError(f"{path} is not a search checkpoint")
+        data = pickle.loads(zlib.decompress(file.read()))
+    parents = array("i")
+    parents.frombytes(data.pop("arena_parents"))
+    arena_moves = array("H")
+    arena_moves.frombytes(data.pop("arena_moves"))
+    ends = array("i")
+    ends.frombytes(data.pop("ends"))
+    states = data.pop("states")
+    frontier = []
+    for index, (node, score, sleep) in enumerate(
+        zip(ends, data.pop("scores"), data.pop("sleeps"))
+    ):
+        moves = array("H")
+        while node:
+            moves.append(arena_moves[node])
+            node = parents[node]
+        moves.reverse()
+        game = FreeCellGame.unpack(states[index * 52 : index * 52 + 52])
+        frontier.append((game, moves, score, frozenset(sleep) or NO_SLEEP))
+    data["frontier"] = frontier
+    visited = array("Q")
+    visited.frombytes(data["visited"])
+    data["visited"] = set(visited)
+    return data
+
+
+def _deferred_best_first_search(
+    game, heuristic, weight=1, use_depth=True, max_states=500000
+):
+    """
+    Best-first search with deferred heuristic evaluation. An expanded state pushes
+    each move as a (parent, move) node ranked by the parent's score; the child
+    state is only built, checked against the visited set and scored when it is
+    popped, so children that never leave the open list cost neither a copy nor a
+    heuristic call. Duplicates are therefore detected at pop time. Takes the same
+    arguments and returns the same results as _best_first_search;
+    states_generated counts the pushed nodes.
     """
     metrics = PerformanceMetrics()
     metrics.start()
-    queue = [(game.heuristic2(), id(game), game, [])]
-    heapq.heapify(queue)
-    visited = {hash(game)}
-    max_states = 500000
-    metrics.states_explored = metrics.states_generated = metrics.max_queue_size = 1
+    evaluate = getattr(FreeCellGame, heuristic)
+    delta = (
+        getattr(FreeCellGame, heuristic + "_delta", None)
+        if incremental_heuristics_enabled
+        else None
+    )
+    queue = make_open_list(weight)
+    queue.push(0, 0, (game, None, array("H"), None))
+    state_key = hash
+    visited = set()
+    layers = None
+    if foundation_layers_enabled:
+        visited = layers = FoundationLayers()
+        state_key = FoundationLayers.key
+        layers.push(game.foundation_count())
+    metrics.states_generated = metrics.max_queue_size = 1
 
     while queue and metrics.states_explored < max_states:
-        _, _, current_game, moves = heapq.heappop(queue)
+        parent, move, moves, parent_score = queue.pop()
+        if layers:
+            layers.pop(parent.foundation_count())
+        if move is None:
+            current_game = parent
+        else:
+            current_game, played = parent.successor(move)
+            moves = moves + encode_moves(played)
+        current_key = state_key(current_game)
+        if current_key in visited:
+            continue
+        visited.add(current_key)
+        if dead_end_detection_enabled:
+            rule = current_game.dead_end_rule()
+            if rule:
+                metrics.dead_ends[rule] += 1
+                continue
         metrics.states_explored += 1
         metrics.max_depth_reached = max(metrics.max_depth_reached, len(moves))
         if current_game.is_solved():
+            if layers:
+                layers.report(metrics)
+            moves = decode_moves(moves)
             metrics.stop(moves)
             return moves, metrics
-        for move in current_game.get_valid_moves():
-            new_game = FreeCellGame(current_game)
-            new_game.make_move(move)
+        if move is None or not delta or len(played) > 1:
+            score = evaluate(current_game)
+        else:
+            score = delta(parent, parent_score, move)
+            if heuristic_delta_debug:
+                assert score == evaluate(current_game), (heuristic, move)
+        depth = len(moves) + 1
+        priority = weight * score + (depth if use_depth else 0)
+        last_move = decode_move(moves[-1]) if moves else None
+        search_moves = current_game.get_search_moves(last_move, metrics.pruned_moves)
+        for new_move in search_moves:
+            queue.push(priority, depth, (current_game, new_move, moves, score))
             metrics.states_generated += 1
-            new_hash = hash(new_game)
-            if new_hash in visited:
-                continue
-            heapq.heappush(
-                queue,
-                (
-                    new_game.heuristic2() + len(moves) + 1,
-                    id(new_game),
-                    new_game,
-                    moves + [move],
-                ),
-            )
-            visited.add(new_hash)
-            metrics.max_queue_size = max(metrics.max_queue_size, len(queue))
+            if layers:
+                layers.push(current_key[0])
+        if layers:
+            layers.collect()
+        metrics.max_queue_size = max(metrics.max_queue_size, len(queue))
+    if layers:
+        layers.report(metrics)
     metrics.stop()
     return None, metrics
 
 
-def solve_freecell_astar3(game):
+def _best_first_search(
+    game,
+    heuristic,
+    weight=1,
+    use_depth=True,
+    max_states=500000,
+    checkpoint_path=None,
+    resume=None,
+):
     """
-    Solves FreeCell using A* search with heuristic3. Returns solution moves
-    and performance metrics, or (None, metrics) if no solution found within
-    500,000 states.
+    Best-first search loop shared by the heap-based solvers. States are ordered by
+    weight * heuristic, plus the depth when use_depth is set (A* style) or by the
+    heuristic alone (greedy), deeper states first on ties; the open list comes
+    from make_open_list (see `bucket_open_list_enabled`). With
+    `deferred_evaluation_enabled` the search runs in _deferred_best_first_search
+    instead. With `batch_heuristics_enabled` (and NumPy installed), all new
+    children of an expanded state are scored in one vectorized call and pushed
+    together; otherwise, with `incremental_heuristics_enabled`, each child is
+    scored from its parent's score and the move (the heuristic's *_delta
+    method). With a `checkpoint_path`, the search
+    state is saved there every CHECKPOINT_INTERVAL seconds and when the budget
+    runs out (see save_search_checkpoint); such searches key visited states by
+    fingerprint, without FoundationLayers or deferred evaluation, and
+    `resume` takes a checkpoint read by load_search_checkpoint() to continue
+    from. Returns solution moves and performance metrics, or (None, metrics)
+    if no solution found within max_states.
     """
+    if deferred_evaluation_enabled and not checkpoint_path:
+        return _deferred_best_first_search(
+            game, heuristic, weight, use_depth, max_states
+        )
     metrics = PerformanceMetrics()
     metrics.start()
-    queue = [(game.heuristic3(), id(game), game, [])]
-    heapq.heapify(queue)
-    visited = {hash(game)}
-    max_states = 500000
-    metrics.states_explored = metrics.states_generated = metrics.max_queue_size = 1
+    evaluate = getattr(FreeCellGame, heuristic)
+    batch_evaluate = (
+        BATCH_HEURISTICS.get(heuristic)
+        if batch_heuristics_enabled and np is not None
+        else None
+    )
+    delta = (
+        getattr(FreeCellGame, heuristic + "_delta", None)
+        if incremental_heuristics_enabled and batch_evaluate is None
+        else None
+    )
+    tablebase = get_endgame_tablebase()
+    database = get_solution_database()
+    queue = make_open_list(weight)
+    state_key = hash
+    visited = set()
+    layers = None
+    if checkpoint_path:
+        state_key = FreeCellGame.fingerprint
+        settings = {
+            "heuristic": heuristic,
+            "weight": weight,
+            "use_depth": use_depth,
+            "max_states": max_states,
+        }
+        next_checkpoint = time.time() + CHECKPOINT_INTERVAL
+    elif foundation_layers_enabled:
+        visited = layers = FoundationLayers()
+        state_key = FoundationLayers.key
+        layers.push(game.foundation_count())
+    if resume:
+        metrics.load_summary(resume["metrics"])
+        metrics.start_time -= resume["elapsed"]
+        visited.update(resume["visited"])
+        for entry in resume["frontier"]:
+            depth = len(entry[1])
+            queue.push(weight * entry[2] + (depth if use_depth else 0), depth, entry)
+    else:
+        score = evaluate(game)
+        queue.push(weight * score, 0, (game, array("H"), score, NO_SLEEP))
+        visited.add(state_key(game))
+        metrics.states_explored = metrics.states_generated = 1
+        metrics.max_queue_size = 1
 
     while queue and metrics.states_explored < max_states:
-        _, _, current_game, moves = heapq.heappop(queue)
+        if checkpoint_path and time.time() >= next_checkpoint:
+            save_search_checkpoint(checkpoint_path, settings, queue, visited, metrics)
+            next_checkpoint = time.time() + CHECKPOINT_INTERVAL
+        current_game, moves, score, sleep = queue.pop()
+        if layers:
+            layers.pop(current_game.foundation_count())
         metrics.states_explored += 1
         metrics.max_depth_reached = max(metrics.max_depth_reached, len(moves))
-        if current_game.is_solved():
+        endgame = tablebase.solve(current_game) if tablebase else None
+        if endgame is None and database:
+            endgame = database.solve(current_game)
+        if endgame is not None:
+            moves = moves + encode_moves(endgame)  # Finished from a known solution
+        elif tablebase and (
+            tablebase.distance(current_game) == EndgameTablebase.UNSOLVABLE
+        ):
+            continue
+        elif database and (
+            database.distance(current_game) == SolutionDatabase.UNSOLVABLE
+        ):
+            continue
+        if endgame is not None or current_game.is_solved():
+            if layers:
+                layers.report(metrics)
+            moves = decode_moves(moves)
             metrics.stop(moves)
             return moves, metrics
-        for move in current_game.get_valid_moves():
-            new_game = FreeCellGame(current_game)
-            new_game.make_move(move)
+        children = []
+        sleeps = []
+        last_move = decode_move(moves[-1]) if moves else None
+        search_moves = current_game.get_search_moves(last_move, metrics.pruned_moves)
+        for move, child_sleep in sleep_set_moves(
+            search_moves, sleep, metrics.pruned_moves
+        ):
+            new_game, played = current_game.successor(move)
             metrics.states_generated += 1
-            new_hash = hash(new_game)
+            new_hash = state_key(new_game)
             if new_hash in visited:
                 continue
-            heapq.heappush(
-                queue,
-                (
-                    new_game.heuristic3() + len(moves) + 1,
-                    id(new_game),
-                    new_game,
-                    moves + [move],
-                ),
-            )
             visited.add(new_hash)
-            metrics.max_queue_size = max(metrics.max_queue_size, len(queue))
+            if dead_end_detection_enabled:
+                rule = new_game.dead_end_rule()
+                if rule:
+                    metrics.dead_ends[rule] += 1
+                    continue
+            children.append((new_game, played))
+            sleeps.append(child_sleep)
+            if layers:
+                layers.push(new_hash[0])
+        if layers:
+            layers.collect()
+        if not children:
+            continue
+        if delta:
+            scores = [
+                delta(current_game, score, played[0])
+                if len(played) == 1
+                else evaluate(new_game)
+                for new_game, played in children
+            ]
+            if heuristic_delta_debug:
+                for (new_game, played), child_score in zip(children, scores):
+                    assert child_score == evaluate(new_game), (heuristic, played)
+        elif batch_evaluate:
+            scores = batch_evaluate(encode_states([child for child, _ in children]))
+            scores = scores.tolist()
+        else:
+            scores = [evaluate(child) for child, _ in children]
+        for (new_game, played), child_score, child_sleep in zip(
+            children, scores, sleeps
+        ):
+            depth = len(moves) + len(played)
+            queue.push(
+                weight * child_score + (depth if use_depth else 0),
+                depth,
+                (new_game, moves + encode_moves(played), child_score, child_sleep),
+            )
+        metrics.max_queue_size = max(metrics.max_queue_size, len(queue))
+    if layers:
+        layers.report(metrics)
+    if checkpoint_path and queue:
+        save_search_checkpoint(checkpoint_path, settings, queue, visited, metrics)
     metrics.stop()
     return None, metrics
 
 
-def solve_freecell_metaheuristic(game):
+def resume_freecell_search(path, max_states=None):
     """
-    Solves FreeCell using A* search with meta_heuristic. Returns solution moves
+    Continues a best-first search from a checkpoint written with the
+    `checkpoint_path` option, with the move generation settings it was
+    started with. States explored before the checkpoint count toward
+    `max_states`, which defaults to the original budget; the search keeps
+    checkpointing to the same file. The current move generation settings are
+    restored afterwards. Returns solution moves and metrics, or (None, metrics)
+    if no solution found within the budget.
+    """
+    checkpoint = load_search_checkpoint(path)
+    settings = checkpoint["settings"]
+    if max_states is None:
+        max_states = settings["max_states"]
+    move_options = _move_options()
+    _apply_move_options(checkpoint["move_options"])
+    try:
+        return _best_first_search(
+            checkpoint["frontier"][-1][0],
+            settings["heuristic"],
+            settings["weight"],
+            settings["use_depth"],
+            max_states,
+            checkpoint_path=path,
+            resume=checkpoint,
+        )
+    finally:
+        _apply_move_options(move_options)
+
+
+def solve_freecell_astar(game, **options):
+    """
+    Solves FreeCell using A* search with heuristic1. Returns solution moves
     and performance metrics, or (None, metrics) if no solution found within
     500,000 states.
     """
-    metrics = PerformanceMetrics()
-    metrics.start()
-    queue = [(game.meta_heuristic(), id(game), game, [])]
-    heapq.heapify(queue)
-    visited = {hash(game)}
-    max_states = 500000
-    metrics.states_explored = metrics.states_generated = metrics.max_queue_size = 1
+    return _best_first_search(game, "heuristic1", **options)
 
-    while queue and metrics.states_explored < max_states:
-        _, _, current_game, moves = heapq.heappop(queue)
-        metrics.states_explored += 1
-        metrics.max_depth_reached = max(metrics.max_depth_reached, len(moves))
-        if current_game.is_solved():
-            metrics.stop(moves)
-            return moves, metrics
-        for move in current_game.get_valid_moves():
-            new_game = FreeCellGame(current_game)
-            new_game.make_move(move)
-            metrics.states_generated += 1
-            new_hash = hash(new_game)
-            if new_hash in visited:
-                continue
-            heapq.heappush(
-                queue,
-                (
-                    new_game.meta_heuristic() + len(moves) + 1,
-                    id(new_game),
-                    new_game,
-                    moves + [move],
-                ),
-            )
-            visited.add(new_hash)
-            metrics.max_queue_size = max(metrics.max_queue_size, len(queue))
-    metrics.stop()
-    return None, metrics
+
+def solve_freecell_astar2(game, **options):
+    """
+    Solves FreeCell using A* search with heuristic2. Returns solution moves
+    and performance metrics, or (None, metrics) if no solution found within
+    500,000 states.
+    """
+    return _best_first_search(game, "heuristic2", **options)
 
 
-def solve_freecell_metaheuristic2(game):
+def solve_freecell_astar3(game, **options):
     """
-    Solves FreeCell using A* search with meta_heuristic2. Returns solution moves
+    Solves FreeCell using A* search with heuristic3. Returns solution moves
     and performance metrics, or (None, metrics) if no solution found within
     500,000 states.
     """
-    metrics = PerformanceMetrics()
-    metrics.start()
-    queue = [(game.meta_heuristic2(), id(game), game, [])]
-    heapq.heapify(queue)
-    visited = {hash(game)}
-    max_states = 700000
-    metrics.states_explored = metrics.states_generated = metrics.max_queue_size = 1
+    return _best_first_search(game, "heuristic3", **options)
 
-    while queue and metrics.states_explored < max_states:
-        _, _, current_game, moves = heapq.heappop(queue)
-        metrics.states_explored += 1
-        metrics.max_depth_reached = max(metrics.max_depth_reached, len(moves))
-        if current_game.is_solved():
-            metrics.stop(moves)
-            return moves, metrics
-        for move in current_game.get_valid_moves():
-            new_game = FreeCellGame(current_game)
-            new_game.make_move(move)
-            metrics.states_generated += 1
-            new_hash = hash(new_game)
-            if new_hash in visited:
-                continue
-            heapq.heappush(
-                queue,
-                (
-                    new_game.meta_heuristic2() + len(moves) + 1,
-                    id(new_game),
-                    new_game,
-                    moves + [move],
-                ),
-            )
-            visited.add(new_hash)
-            metrics.max_queue_size = max(metrics.max_queue_size, len(queue))
-    metrics.stop()
-    return None, metrics
+
+def solve_freecell_pattern_database(game, weight=2, **options):
+    """
+    Solves FreeCell using weighted A* search with pattern_database_heuristic.
+    The heuristic stays close to the true distance, so it needs a weight to
+    reach the greediness of the inflated heuristic3. Returns solution moves
+    and metrics, or (None, metrics) if no solution within 500,000 states.
+    """
+    return _best_first_search(
+        game, "pattern_database_heuristic", weight=weight, **options
+    )
+
+
+def solve_freecell_metaheuristic(game, **options):
+    """
+    Solves FreeCell using A* search with meta_heuristic. Returns solution moves
+    and performance metrics, or (None, metrics) if no solution found within
+    500,000 states.
+    """
+    return _best_first_search(game, "meta_heuristic", **options)
+
+
+def solve_freecell_metaheuristic2(game, max_states=700000, **options):
+    """
+    Solves FreeCell using A* search with meta_heuristic2. Returns solution moves
+    and performance metrics, or (None, metrics) if no solution found within
+    700,000 states.
+    """
+    return _best_first_search(game, "meta_heuristic2", max_states=max_states, **options)
 
 
-def solve_freecell_weighted_astar(game, weight=1.5):
+def solve_freecell_weighted_astar(game, weight=1.5, **options):
     """
     Solves FreeCell using weighted A* search with heuristic3. Weight parameter
     controls heuristic influence. Returns solution moves and metrics, or
     (None, metrics) if no solution within 500,000 states.
     """
+    return _best_first_search(game, "heuristic3", weight=weight, **options)
+
+
+# Heuristics that never overestimate the number of moves left
+ADMISSIBLE_HEURISTICS = {"heuristic1"}
+
+
+def solve_freecell_optimal_astar(game, heuristic="heuristic1", max_states=500000):
+    """
+    Solves FreeCell using A* search that returns a shortest solution as long as
+    the heuristic is admissible. heuristic1 is, since a move puts at most one card
+    on the foundations; safe autoplay moves are counted like any other move.
+
+    Unlike solve_freecell_astar, states are not closed when first generated: a map
+    of state -> best known number of moves (g) is kept, and a state reached again
+    by a cheaper path is pushed again, even if it was already expanded, so
+    inconsistent heuristics stay optimal too. Superseded open-list entries are
+    skipped when popped. metrics.optimality_proven tells whether the search ended
+    within max_states; with a heuristic outside ADMISSIBLE_HEURISTICS a solution
+    found is not proven shortest and leaves it None. Returns solution moves and
+    metrics, or (None, metrics).
+    """
     metrics = PerformanceMetrics()
     metrics.start()
-    queue = [(game.heuristic3() * weight, id(game), game, [])]
-    heapq.heapify(queue)
-    visited = set()
-    visited.add(hash(game))
-    max_states = 500000
-    metrics.states_explored = 0
-    metrics.states_generated = 1
-    metrics.max_queue_size = 1
+    metrics.optimality_proven = False
+    evaluate = getattr(FreeCellGame, heuristic)
+    queue = make_open_list()
+    queue.push(evaluate(game), 0, (game, []))
+    best_g = {hash(game): 0}
+    metrics.states_generated = metrics.max_queue_size = 1
 
     while queue and metrics.states_explored < max_states:
-        _, _, current_game, moves = heapq.heappop(queue)
+        current_game, moves = queue.pop()
+        g = len(moves)
+        if g > best_g[hash(current_game)]:
+            continue  # Reached by a cheaper path since this entry was pushed
         metrics.states_explored += 1
-        metrics.max_depth_reached = max(metrics.max_depth_reached, len(moves))
+        metrics.max_depth_reached = max(metrics.max_depth_reached, g)
         if current_game.is_solved():
+            admissible = heuristic in ADMISSIBLE_HEURISTICS
+            metrics.optimality_proven = True if admissible else None
             metrics.stop(moves)
             return moves, metrics
-        valid_moves = current_game.get_valid_moves()
-        for move in valid_moves:
-            new_game = FreeCellGame(current_game)
-            new_game.make_move(move)
+        last_move = moves[-1] if moves else None
+        search_moves = current_game.get_search_moves(last_move, metrics.pruned_moves)
+        for move in search_moves:
+            new_game, played = current_game.successor(move)
             metrics.states_generated += 1
             new_hash = hash(new_game)
-            if new_hash in visited:
+            new_g = g + len(played)
+            if best_g.get(new_hash, new_g + 1) <= new_g:
                 continue
-            heapq.heappush(
-                queue,
-                (
-                    len(moves) + 1 + weight * new_game.heuristic3(),
-                    id(new_game),
-                    new_game,
-                    moves + [move],
-                ),
-            )
-            visited.add(new_hash)
-            metrics.max_queue_size = max(metrics.max_queue_size, len(queue))
+            best_g[new_hash] = new_g
+            if dead_end_detection_enabled:
+                rule = new_game.dead_end_rule()
+                if rule:
+                    metrics.dead_ends[rule] += 1
+                    continue
+            queue.push(evaluate(new_game) + new_g, new_g, (new_game, moves + played))
+        metrics.max_queue_size = max(metrics.max_queue_size, len(queue))
+    metrics.optimality_proven = not queue
     metrics.stop()
     return None, metrics
 
@@ -2333,83 +4440,334 @@ def get_hint(game):
         "Meta2": "metaheuristic2",
         "A* Heu2": "astar2",
         "A* Heu3": "astar3",
+        "Portfolio": "portfolio",
+        "HDA*": "hda",
+        "Optimal A*": "optimal_astar",
+        "WA* PDB": "pattern_database",
+        "External BFS": "external_bfs",
+        "Frontier BFS": "frontier_bfs",
     }
     algo_key = algo_map.get(current_algorithm, "astar")
     moves, _ = solve_freecell(game, algo_key)
     return moves[0] if moves else None
 
 
-def solve_freecell_greedy(game):
+def solve_freecell_greedy(game, **options):
     """
     Solves FreeCell using greedy search with heuristic3. Returns
     solution moves and metrics, or (None, metrics) if no solution found within
     500,000 states.
     """
+    return _best_first_search(game, "heuristic3", use_depth=False, **options)
+
+
+def solve_freecell_bfs(game, max_states=200000):
+    """
+    Solves FreeCell using breadth-first search. Returns solution moves and
+    metrics, or (None, metrics) if no solution found within 200,000 states.
+    """
     metrics = PerformanceMetrics()
     metrics.start()
-    queue = [(game.heuristic3(), id(game), game, [])]
-    heapq.heapify(queue)
-    visited = {hash(game)}
-    max_states = 500000
+    queue = deque([(game, [], NO_SLEEP)])
+    state_key = hash
+    visited = set()
+    layers = None
+    if foundation_layers_enabled:
+        visited = layers = FoundationLayers()
+        state_key = FoundationLayers.key
+        layers.push(game.foundation_count())
+    visited.add(state_key(game))
     metrics.states_explored = metrics.states_generated = metrics.max_queue_size = 1
 
     while queue and metrics.states_explored < max_states:
-        _, _, current_game, moves = heapq.heappop(queue)
+        current_game, moves, sleep = queue.popleft()
+        if layers:
+            layers.pop(current_game.foundation_count())
         metrics.states_explored += 1
         metrics.max_depth_reached = max(metrics.max_depth_reached, len(moves))
         if current_game.is_solved():
+            if layers:
+                layers.report(metrics)
             metrics.stop(moves)
             return moves, metrics
-        for move in current_game.get_valid_moves():
-            new_game = FreeCellGame(current_game)
-            new_game.make_move(move)
+        last_move = moves[-1] if moves else None
+        search_moves = current_game.get_search_moves(last_move, metrics.pruned_moves)
+        for move, child_sleep in sleep_set_moves(
+            search_moves, sleep, metrics.pruned_moves
+        ):
+            new_game, played = current_game.successor(move)
             metrics.states_generated += 1
-            new_hash = hash(new_game)
+            new_hash = state_key(new_game)
             if new_hash in visited:
                 continue
-            heapq.heappush(
-                queue, (new_game.heuristic3(), id(new_game), new_game, moves + [move])
-            )
             visited.add(new_hash)
+            if dead_end_detection_enabled:
+                rule = new_game.dead_end_rule()
+                if rule:
+                    metrics.dead_ends[rule] += 1
+                    continue
+            queue.append((new_game, moves + played, child_sleep))
+            if layers:
+                layers.push(new_hash[0])
             metrics.max_queue_size = max(metrics.max_queue_size, len(queue))
+        if layers:
+            layers.collect()
+    if layers:
+        layers.report(metrics)
     metrics.stop()
     return None, metrics
 
 
-def solve_freecell_bfs(game):
+# External-memory BFS records: a packed state (FreeCellGame.pack) followed by
+# the index of its parent in the previous layer file, as 4 little-endian bytes
+EXTERNAL_RECORD_SIZE = 56
+EXTERNAL_RUN_SIZE = 200000  # Children sorted in memory before a run is written
+EXTERNAL_MERGE_FAN_IN = 64  # Runs merged at once, to stay within open file limits
+
+
+def _read_records(path, block=4096):
+    """Streams the fixed-size records of a layer or run file."""
+    with open(path, "rb") as file:
+        while True:
+            data = file.read(EXTERNAL_RECORD_SIZE * block)
+            if not data:
+                return
+            for start in range(0, len(data), EXTERNAL_RECORD_SIZE):
+                yield data[start : start + EXTERNAL_RECORD_SIZE]
+
+
+def _write_run(records, path):
+    """Sorts `records` by state, writes one per state to `path` and clears them."""
+    records.sort()
+    with open(path, "wb") as file:
+        previous = None
+        for record in records:
+            if record[:52] != previous:
+                file.write(record)
+                previous = record[:52]
+    records.clear()
+
+
+def _merge_layer(runs, layers, path):
     """
-    Solves FreeCell using breadth-first search. Returns solution moves and
-    metrics, or (None, metrics) if no solution found within 200,000 states.
+    Merges sorted runs into the next layer file, keeping one record per state
+    and dropping states that are already in one of the earlier `layers`.
+    Everything is streamed, so memory use does not depend on the layer sizes.
+    Returns the number of states written.
+    """
+    known = heapq.merge(*(_read_records(layer) for layer in layers))
+    known_record = next(known, None)
+    count = 0
+    previous = None
+    with open(path, "wb") as file:
+        for record in heapq.merge(*(_read_records(run) for run in runs)):
+            state = record[:52]
+            if state == previous:
+                continue
+            previous = state
+            while known_record is not None and known_record[:52] < state:
+                known_record = next(known, None)
+            if known_record is not None and known_record[:52] == state:
+                continue
+            file.write(record)
+            count += 1
+    return count
+
+
+def _external_bfs_path(layers, index, goal):
+    """
+    Rebuilds the solution moves of the external-memory BFS: follows the parent
+    indices from record `index` of the last layer back to the start, then
+    finds the successor leading from each state on the path to the next.
+    """
+    states = [goal]
+    for layer in reversed(layers):
+        with open(layer, "rb") as file:
+            file.seek(index * EXTERNAL_RECORD_SIZE)
+            record = file.read(EXTERNAL_RECORD_SIZE)
+        states.append(FreeCellGame.unpack(record[:52]))
+        index = int.from_bytes(record[52:], "little")
+    states.reverse()
+    moves = []
+    for parent, child in zip(states, states[1:]):
+        target = child.pack()
+        for move in parent.get_search_moves():
+            new_game, played = parent.successor(move)
+            if new_game.pack() == target:
+                moves.extend(played)
+                break
+    return moves
+
+
+def solve_freecell_external_bfs(game, max_states=5000000, directory=None):
+    """
+    Solves FreeCell using breadth-first search with its layers on disk, for
+    exhaustive searches larger than memory. Each depth layer is a file of
+    records sorted by packed state (see EXTERNAL_RECORD_SIZE). Children of a
+    layer are sorted in runs of EXTERNAL_RUN_SIZE, and duplicates are only
+    removed afterwards (delayed duplicate detection), by merging the runs
+    against every earlier layer. Only one run of children is held in memory.
+    Layer files live in a temporary directory under `directory` (the system
+    default if None) and are deleted at the end. Depth counts successors, so
+    safe auto-moves played along with a move do not count. Returns solution
+    moves and metrics, or (None, metrics) if no solution found within
+    5,000,000 states.
     """
     metrics = PerformanceMetrics()
     metrics.start()
-    queue = deque([(game, [])])
-    visited = {hash(game)}
-    max_states = 200000
-    metrics.states_explored = metrics.states_generated = metrics.max_queue_size = 1
-
-    while queue and metrics.states_explored < max_states:
-        current_game, moves = queue.popleft()
-        metrics.states_explored += 1
-        metrics.max_depth_reached = max(metrics.max_depth_reached, len(moves))
-        if current_game.is_solved():
-            metrics.stop(moves)
-            return moves, metrics
-        for move in current_game.get_valid_moves():
-            new_game = FreeCellGame(current_game)
-            new_game.make_move(move)
-            metrics.states_generated += 1
-            new_hash = hash(new_game)
-            if new_hash in visited:
-                continue
-            queue.append((new_game, moves + [move]))
-            visited.add(new_hash)
-            metrics.max_queue_size = max(metrics.max_queue_size, len(queue))
+    metrics.states_generated = metrics.max_queue_size = 1
+    if game.is_solved():
+        metrics.stop([])
+        return [], metrics
+    with tempfile.TemporaryDirectory(prefix="freecell-bfs-", dir=directory) as work:
+        layers = [os.path.join(work, "layer0")]
+        with open(layers[0], "wb") as file:
+            file.write(game.pack() + bytes(4))
+        while metrics.states_explored < max_states:
+            runs = []
+            children = []
+            for index, record in enumerate(_read_records(layers[-1])):
+                if metrics.states_explored >= max_states:
+                    break
+                current_game = FreeCellGame.unpack(record[:52])
+                metrics.states_explored += 1
+                for move in current_game.get_search_moves(None, metrics.pruned_moves):
+                    new_game, _ = current_game.successor(move)
+                    metrics.states_generated += 1
+                    if new_game.is_solved():
+                        moves = _external_bfs_path(layers, index, new_game)
+                        metrics.stop(moves)
+                        return moves, metrics
+                    if dead_end_detection_enabled:
+                        rule = new_game.dead_end_rule()
+                        if rule:
+                            metrics.dead_ends[rule] += 1
+                            continue
+                    children.append(new_game.pack() + index.to_bytes(4, "little"))
+                    if len(children) >= EXTERNAL_RUN_SIZE:
+                        runs.append(os.path.join(work, f"run{len(runs)}"))
+                        _write_run(children, runs[-1])
+            if metrics.states_explored >= max_states:
+                break
+            if children:
+                runs.append(os.path.join(work, f"run{len(runs)}"))
+                _write_run(children, runs[-1])
+            while len(runs) > EXTERNAL_MERGE_FAN_IN:
+                merged = os.path.join(work, f"run{len(layers)}-{len(runs)}")
+                _merge_layer(runs[:EXTERNAL_MERGE_FAN_IN], [], merged)
+                for run in runs[:EXTERNAL_MERGE_FAN_IN]:
+                    os.remove(run)
+                runs = runs[EXTERNAL_MERGE_FAN_IN:] + [merged]
+            layer = os.path.join(work, f"layer{len(layers)}")
+            count = _merge_layer(runs, layers, layer)
+            for run in runs:
+                os.remove(run)
+            if not count:
+                break  # Search space exhausted
+            layers.append(layer)
+            metrics.max_queue_size = max(metrics.max_queue_size, count)
+            metrics.max_depth_reached = len(layers) - 1
+            metrics.track_peak_memory()
     metrics.stop()
     return None, metrics
 
 
-def solve_freecell_dfs(game):
+def _frontier_search(game, target, metrics, max_states=None, max_depth=None):
+    """
+    Breadth-first frontier search from `game` to the state `target`, or to any
+    solved state if `target` is None. Only the previous, current and next
+    layers are kept for duplicate detection, as packed states (see
+    `FreeCellGame.pack`), and no node stores its path. Instead each node keeps
+    a relay: its ancestor at the largest power-of-two depth not beyond its
+    own. Once the target is found, the moves from `game` to the relay and from
+    the relay to the target's parent are recovered by two smaller frontier
+    searches (divide and conquer), which count toward the same `max_states`.
+    Returns the moves, or None if the target is not reached, or its path not
+    recovered, within `max_states` or `max_depth`.
+    """
+    if game.is_solved() if target is None else game == target:
+        return []
+    start = game.pack()
+    previous_layer, layer = {}, {start: start}  # Packed state -> packed relay
+    depth = 0
+    while layer and (max_depth is None or depth < max_depth):
+        depth += 1
+        new_relay = depth & (depth - 1) == 0  # Children start a new relay layer
+        next_layer = {}
+        for packed, relay in layer.items():
+            if relay is None:
+                continue  # Dead end
+            if max_states is not None and metrics.states_explored >= max_states:
+                return None
+            current_game = FreeCellGame.unpack(packed)
+            metrics.states_explored += 1
+            for move in current_game.get_search_moves(None, metrics.pruned_moves):
+                new_game, played = current_game.successor(move)
+                metrics.states_generated += 1
+                if new_game.is_solved() if target is None else new_game == target:
+                    if depth == 1:
+                        return played
+                    relay_game = FreeCellGame.unpack(relay)
+                    relay_depth = 1 << (depth - 1).bit_length() - 1
+                    # The sub-searches share metrics, so max_states caps them
+                    # at the budget left
+                    first = _frontier_search(
+                        game, relay_game, metrics, max_states, relay_depth
+                    )
+                    if first is None:
+                        return None
+                    second = _frontier_search(
+                        relay_game,
+                        current_game,
+                        metrics,
+                        max_states,
+                        depth - 1 - relay_depth,
+                    )
+                    if second is None:
+                        return None
+                    return first + second + played
+                new_packed = new_game.pack()
+                if (
+                    new_packed in next_layer
+                    or new_packed in layer
+                    or new_packed in previous_layer
+                ):
+                    continue
+                if dead_end_detection_enabled:
+                    rule = new_game.dead_end_rule()
+                    if rule:
+                        metrics.dead_ends[rule] += 1
+                        next_layer[new_packed] = None
+                        continue
+                next_layer[new_packed] = new_packed if new_relay else relay
+        previous_layer = layer
+        layer = next_layer
+        metrics.max_queue_size = max(metrics.max_queue_size, len(layer))
+        metrics.max_depth_reached = max(metrics.max_depth_reached, depth)
+        metrics.track_peak_memory()
+    return None
+
+
+def solve_freecell_frontier_bfs(game, max_states=200000):
+    """
+    Solves FreeCell using breadth-first frontier search, which keeps only the
+    open layer and the two layers before it instead of every state seen (see
+    `_frontier_search`). A state reached again after an irreversible move may
+    be expanded twice, and the path is rebuilt by searching again up to the
+    relay layers, so it explores more states than `solve_freecell_bfs` to
+    find the same shortest solution with less memory. Returns solution moves
+    and metrics, or (None, metrics) if no solution found within 200,000
+    states, counting the states explored to rebuild the path.
+    """
+    metrics = PerformanceMetrics()
+    metrics.start()
+    metrics.states_generated = metrics.max_queue_size = 1
+    moves = _frontier_search(game, None, metrics, max_states)
+    metrics.stop(moves)
+    return moves, metrics
+
+
+def solve_freecell_dfs(game, max_states=200000):
     """
     Solves FreeCell using depth-first search with depth limit of 150. Returns
     solution moves and metrics, or (None, metrics) if no solution found within
@@ -2417,14 +4775,13 @@ def solve_freecell_dfs(game):
     """
     metrics = PerformanceMetrics()
     metrics.start()
-    stack = [(game, [])]
+    stack = [(game, [], NO_SLEEP)]
     visited = {hash(game)}
-    max_states = 200000
     max_depth = 150
     metrics.states_explored = metrics.states_generated = metrics.max_queue_size = 1
 
     while stack and metrics.states_explored < max_states:
-        current_game, moves = stack.pop()
+        current_game, moves, sleep = stack.pop()
         metrics.states_explored += 1
         metrics.max_depth_reached = max(metrics.max_depth_reached, len(moves))
         if len(moves) > max_depth:
@@ -2432,21 +4789,28 @@ def solve_freecell_dfs(game):
         if current_game.is_solved():
             metrics.stop(moves)
             return moves, metrics
-        for move in reversed(current_game.get_valid_moves()):
-            new_game = FreeCellGame(current_game)
-            new_game.make_move(move)
+        last_move = moves[-1] if moves else None
+        search_moves = current_game.get_search_moves(last_move, metrics.pruned_moves)
+        expanded = sleep_set_moves(search_moves, sleep, metrics.pruned_moves)
+        for move, child_sleep in reversed(expanded):
+            new_game, played = current_game.successor(move)
             metrics.states_generated += 1
             new_hash = hash(new_game)
             if new_hash in visited:
                 continue
-            stack.append((new_game, moves + [move]))
             visited.add(new_hash)
+            if dead_end_detection_enabled:
+                rule = new_game.dead_end_rule()
+                if rule:
+                    metrics.dead_ends[rule] += 1
+                    continue
+            stack.append((new_game, moves + played, child_sleep))
             metrics.max_queue_size = max(metrics.max_queue_size, len(stack))
     metrics.stop()
     return None, metrics
 
 
-def solve_freecell_ids(game):
+def solve_freecell_ids(game, max_states=200000):
     """
     Solves FreeCell using iterative deepening search with max depth of 150. Returns
     solution moves and metrics, or (None, metrics) if no solution found within
@@ -2454,7 +4818,6 @@ def solve_freecell_ids(game):
     """
     metrics = PerformanceMetrics()
     metrics.start()
-    max_states = 200000
     max_depth = 150
 
     for depth_limit in range(max_depth + 1):
@@ -2478,13 +4841,16 @@ def solve_freecell_ids(game):
             if current_game.is_solved():
                 metrics.stop(moves)
                 return moves, metrics
-            for move in reversed(current_game.get_valid_moves()):
-                new_game = FreeCellGame(current_game)
-                new_game.make_move(move)
+            last_move = moves[-1] if moves else None
+            search_moves = current_game.get_search_moves(
+                last_move, local_metrics.pruned_moves
+            )
+            for move in reversed(search_moves):
+                new_game, played = current_game.successor(move)
                 new_hash = hash(new_game)
                 if new_hash in visited:
                     continue
-                stack.append((new_game, moves + [move], depth + 1))
+                stack.append((new_game, moves + played, depth + 1))
                 visited.add(new_hash)
                 local_metrics.states_generated += 1
                 local_metrics.max_queue_size = max(
@@ -2492,6 +4858,7 @@ def solve_freecell_ids(game):
                 )
         metrics.states_explored += local_metrics.states_explored
         metrics.states_generated += local_metrics.states_generated
+        metrics.pruned_moves.update(local_metrics.pruned_moves)
         metrics.max_queue_size = max(
             metrics.max_queue_size, local_metrics.max_queue_size
         )
@@ -2501,12 +4868,389 @@ def solve_freecell_ids(game):
     return None, metrics
 
 
-def solve_freecell(game, algorithm="astar"):
+PORTFOLIO_ALGORITHMS = ["metaheuristic2", "astar2", "astar3", "weighted_astar"]
+
+
+def _apply_move_options(move_options):
+    """
+    Applies the parent's move generation settings, as returned by
+    _move_options(), inside a solver worker process.
+    """
+    global auto_moves_enabled, empty_to_empty_moves_disabled
+    global prune_reversals_enabled, prune_empty_cascade_targets_enabled
+    global prune_commuting_moves_enabled, sleep_sets_enabled, dig_out_moves_enabled
+    global dead_end_detection_enabled
+    (
+        auto_moves_enabled,
+        empty_to_empty_moves_disabled,
+        prune_reversals_enabled,
+        prune_empty_cascade_targets_enabled,
+        prune_commuting_moves_enabled,
+        sleep_sets_enabled,
+        dig_out_moves_enabled,
+        dead_end_detection_enabled,
+    ) = move_options
+
+
+def _move_options():
+    """Returns the move generation settings to pass to solver worker processes."""
+    return (
+        auto_moves_enabled,
+        empty_to_empty_moves_disabled,
+        prune_reversals_enabled,
+        prune_empty_cascade_targets_enabled,
+        prune_commuting_moves_enabled,
+        sleep_sets_enabled,
+        dig_out_moves_enabled,
+        dead_end_detection_enabled,
+    )
+
+
+def _portfolio_worker(game, algorithm, move_options, options, results):
+    """
+    Runs one solver of a portfolio in a worker process, with the keyword
+    `options` of the portfolio, and reports its outcome as (algorithm, moves,
+    metrics summary) on the results queue.
+    """
+    # pygame.init() at import catches SIGTERM, which would keep losers running
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    _apply_move_options(move_options)
+    moves, metrics = solve_freecell(game, algorithm, **options)
+    results.put((algorithm, moves, metrics.summary()))
+
+
+def solve_freecell_portfolio(game, algorithms=None, deadline=None, **options):
+    """
+    Races several solvers on the same deal, each in its own process. Without a
+    deadline the first solution found wins; with a deadline (in seconds) the
+    shortest solution found before it expires is returned. Losing workers are
+    terminated as soon as the race is decided. Every solver keeps its own
+    visited set: the raced algorithms order states differently, so sharing one
+    would change their results. Extra keyword options (e.g. max_states) are
+    passed on to every solver. Returns solution moves and
+    metrics (counters of the winning solver), or (None, metrics).
+    """
+    metrics = PerformanceMetrics()
+    metrics.start()
+    algorithms = algorithms or PORTFOLIO_ALGORITHMS
+    context = multiprocessing.get_context()
+    results = context.Queue()
+    move_options = _move_options()
+    workers = [
+        context.Process(
+            target=_portfolio_worker,
+            args=(game, algorithm, move_options, options, results),
+            daemon=True,
+        )
+        for algorithm in algorithms
+    ]
+    for worker in workers:
+        worker.start()
+
+    stop_time = time.time() + deadline if deadline else None
+    best = None
+    pending = len(workers)
+    try:
+        while pending:
+            if stop_time is not None and time.time() >= stop_time:
+                break
+            try:
+                algorithm, moves, summary = results.get(timeout=0.1)
+            except Empty:
+                if not any(worker.is_alive() for worker in workers):
+                    break  # A worker died without reporting
+                continue
+            pending -= 1
+            print(
+                f"Portfolio: {algorithm} finished "
+                + (f"with {len(moves)} moves" if moves else "without a solution")
+            )
+            if moves and (best is None or len(moves) < len(best[1])):
+                best = (algorithm, moves, summary)
+                if stop_time is None:
+                    break
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+        for worker in workers:
+            worker.join(timeout=1)
+            if worker.is_alive():
+                worker.kill()
+                worker.join()
+
+    if best is None:
+        metrics.stop()
+        return None, metrics
+    algorithm, moves, summary = best
+    metrics.load_summary(summary)
+    metrics.winning_algorithm = algorithm
+    metrics.stop(moves)
+    print(f"Portfolio winner: {algorithm}")
+    return moves, metrics
+
+
+# Heuristic settings of the heap-based solvers, as passed to _best_first_search
+BEST_FIRST_SETTINGS = {
+    "astar": {"heuristic": "heuristic1"},
+    "astar2": {"heuristic": "heuristic2"},
+    "astar3": {"heuristic": "heuristic3"},
+    "greedy": {"heuristic": "heuristic3", "use_depth": False},
+    "weighted_astar": {"heuristic": "heuristic3", "weight": 1.5},
+    "metaheuristic": {"heuristic": "meta_heuristic"},
+    "metaheuristic2": {"heuristic": "meta_heuristic2"},
+    "pattern_database": {"heuristic": "pattern_database_heuristic", "weight": 2},
+}
+
+# Slots of the shared counter array used by the hash-distributed search
+HDA_IN_FLIGHT, HDA_IDLE_WORKERS, HDA_EXPLORED = range(3)
+
+
+def _hda_worker(
+    worker_id,
+    settings,
+    move_options,
+    inboxes,
+    results,
+    shared,
+    stop,
+    max_states,
+    batch_size,
+):
+    """
+    One worker of the hash-distributed best-first search. The worker owns every
+    state whose fingerprint maps to its id: it keeps the open and closed lists for
+    those states and sends the children it generates to their owners' inboxes in
+    batches. Reports ("solution", moves) if it expands a goal state and always
+    finishes with ("stats", worker_id, explored, generated, max_queue_size,
+    pruned), where pruned counts the moves removed by each pruning rule.
+
+    Termination: `shared` counts the nodes sent but not yet received and the idle
+    workers, both updated under one lock. The search is exhausted when every
+    worker is idle and nothing is in flight; `stop` is set on a solution, on
+    exhaustion or when the shared explored count reaches max_states.
+    """
+    # pygame.init() at import catches SIGTERM, which would defeat terminate()
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    _apply_move_options(move_options)
+    for inbox in inboxes:
+        inbox.cancel_join_thread()  # Unread batches must not block exit after stop
+    evaluate = getattr(FreeCellGame, settings["heuristic"])
+    weight = settings.get("weight", 1)
+    use_depth = settings.get("use_depth", True)
+    num_workers = len(inboxes)
+    inbox = inboxes[worker_id]
+    open_list = make_open_list(weight)
+    closed = set()
+    outboxes = [[] for _ in range(num_workers)]
+    explored = generated = max_queue_size = unreported = 0
+    pruned = Counter()
+    idle = False
+
+    def send(owner):
+        batch = outboxes[owner]
+        outboxes[owner] = []
+        with shared.get_lock():
+            shared[HDA_IN_FLIGHT] += len(batch)
+        inboxes[owner].put(batch)
+
+    def accept(entries):
+        for priority, state_fingerprint, packed, moves in entries:
+            if state_fingerprint in closed:
+                continue
+            closed.add(state_fingerprint)
+            open_list.push(priority, len(moves), (packed, moves))
+
+    while not stop.is_set():
+        batches = []
+        try:
+            while True:
+                batches.append(inbox.get_nowait())
+        except Empty:
+            pass
+        if not batches and not open_list:
+            for owner in range(num_workers):
+                if outboxes[owner]:
+                    send(owner)
+            if not idle:
+                idle = True
+                with shared.get_lock():
+                    shared[HDA_IDLE_WORKERS] += 1
+                    if (
+                        shared[HDA_IDLE_WORKERS] == num_workers
+                        and shared[HDA_IN_FLIGHT] == 0
+                    ):
+                        stop.set()
+            try:
+                batches.append(inbox.get(timeout=0.05))
+            except Empty:
+                continue
+        if batches:
+            with shared.get_lock():
+                if idle:
+                    shared[HDA_IDLE_WORKERS] -= 1
+                    idle = False
+                shared[HDA_IN_FLIGHT] -= sum(len(batch) for batch in batches)
+            for batch in batches:
+                accept(batch)
+        if not open_list:
+            continue
+
+        packed, moves = open_list.pop()
+        current_game = FreeCellGame.unpack(packed)
+        explored += 1
+        unreported += 1
+        if current_game.is_solved():
+            results.put(("solution", decode_moves(moves)))
+            stop.set()
+            break
+        last_move = decode_move(moves[-1]) if moves else None
+        for move in current_game.get_search_moves(last_move, pruned):
+            new_game, played = current_game.successor(move)
+            generated += 1
+            new_packed = new_game.pack()
+            new_fingerprint = int.from_bytes(
+                hashlib.blake2b(new_packed, digest_size=8).digest(), "little"
+            )
+            priority = weight * evaluate(new_game)
+            if use_depth:
+                priority += len(moves) + len(played)
+            new_moves = moves + encode_moves(played)
+            entry = (priority, new_fingerprint, new_packed, new_moves)
+            owner = new_fingerprint % num_workers
+            if owner == worker_id:
+                accept([entry])
+            else:
+                outboxes[owner].append(entry)
+                if len(outboxes[owner]) >= batch_size:
+                    send(owner)
+        max_queue_size = max(max_queue_size, len(open_list))
+        if unreported >= batch_size:
+            with shared.get_lock():
+                shared[HDA_EXPLORED] += unreported
+                if shared[HDA_EXPLORED] >= max_states:
+                    stop.set()
+            unreported = 0
+            for owner in range(num_workers):
+                if outboxes[owner]:
+                    send(owner)
+
+    results.put(("stats", worker_id, explored, generated, max_queue_size, pruned))
+
+
+def solve_freecell_hda(
+    game,
+    algorithm="astar3",
+    num_workers=None,
+    max_states=500000,
+    batch_size=32,
+):
+    """
+    Solves FreeCell with a hash-distributed version of one of the heap-based
+    solvers (HDA*): every state is owned by the worker process its fingerprint
+    maps to, so the open and closed lists are split across num_workers processes
+    (default: one per CPU). No two workers ever see the same state, so there is
+    no duplicate detection to share between them. Returns solution moves and
+    metrics summed over all workers, or (None, metrics) if no solution found
+    within max_states.
+    """
+    metrics = PerformanceMetrics()
+    metrics.start()
+    settings = BEST_FIRST_SETTINGS[algorithm]
+    num_workers = num_workers or os.cpu_count() or 1
+    context = multiprocessing.get_context()
+    inboxes = [context.Queue() for _ in range(num_workers)]
+    results = context.Queue()
+    shared = context.Array("q", 3)
+    stop = context.Event()
+
+    packed = game.pack()
+    root_fingerprint = game.fingerprint()
+    priority = settings.get("weight", 1) * getattr(game, settings["heuristic"])()
+    shared[HDA_IN_FLIGHT] = 1
+    inboxes[root_fingerprint % num_workers].put(
+        [(priority, root_fingerprint, packed, array("H"))]
+    )
+
+    move_options = _move_options()
+    workers = [
+        context.Process(
+            target=_hda_worker,
+            args=(
+                worker_id,
+                settings,
+                move_options,
+                inboxes,
+                results,
+                shared,
+                stop,
+                max_states,
+                batch_size,
+            ),
+            daemon=True,
+        )
+        for worker_id in range(num_workers)
+    ]
+    for worker in workers:
+        worker.start()
+
+    solution = None
+    stats = {}
+    while len(stats) < num_workers:
+        try:
+            message = results.get(timeout=0.1)
+        except Empty:
+            if not any(worker.is_alive() for worker in workers):
+                break
+            continue
+        if message[0] == "solution":
+            solution = solution or message[1]
+        else:
+            stats[message[1]] = message[2:]
+    for worker in workers:
+        worker.join(timeout=1)
+        if worker.is_alive():
+            worker.terminate()
+
+    metrics.states_explored = sum(explored for explored, _, _, _ in stats.values())
+    metrics.states_generated = sum(generated for _, generated, _, _ in stats.values())
+    metrics.max_queue_size = sum(queue_size for _, _, queue_size, _ in stats.values())
+    for _, _, _, pruned in stats.values():
+        metrics.pruned_moves.update(pruned)
+    metrics.worker_states_explored = [
+        stats[worker_id][0] for worker_id in sorted(stats)
+    ]
+    if solution:
+        metrics.max_depth_reached = len(solution)
+    metrics.stop(solution)
+    return solution, metrics
+
+
+def solve_freecell(game, algorithm="astar", **options):
     """
     Solves FreeCell using specified algorithm (default: astar). Returns solution
     moves and metrics by delegating to the appropriate algorithm-specific solver.
+    Extra keyword options (e.g. max_states) are passed on to that solver. With
+    `solution_database_enabled`, a position with a known solution or proven
+    dead end is answered from the SolutionDatabase without searching, and new
+    solutions and dead ends (exhaustive searches that found nothing) are
+    recorded there.
     """
-    return {
+    database = get_solution_database()
+    if database:
+        distance = database.distance(game)
+        moves = None if distance is None else database.solve(game)
+        if moves is not None or distance == SolutionDatabase.UNSOLVABLE:
+            print(
+                f"Solution database: known solution with {len(moves)} moves"
+                if moves is not None
+                else "Solution database: known dead end"
+            )
+            metrics = PerformanceMetrics()
+            metrics.start()
+            metrics.stop(moves)
+            return moves, metrics
+    moves, metrics = {
         "astar": solve_freecell_astar,
         "greedy": solve_freecell_greedy,
         "bfs": solve_freecell_bfs,
@@ -2517,7 +5261,182 @@ def solve_freecell(game, algorithm="astar"):
         "metaheuristic2": solve_freecell_metaheuristic2,
         "astar2": solve_freecell_astar2,
         "astar3": solve_freecell_astar3,
-    }.get(algorithm, solve_freecell_astar)(game)
+        "portfolio": solve_freecell_portfolio,
+        "hda": solve_freecell_hda,
+        "optimal_astar": solve_freecell_optimal_astar,
+        "pattern_database": solve_freecell_pattern_database,
+        "external_bfs": solve_freecell_external_bfs,
+        "frontier_bfs": solve_freecell_frontier_bfs,
+    }.get(algorithm, solve_freecell_astar)(game, **options)
+    if database and moves:
+        database.record(game, moves)
+    elif database and moves is None and metrics.optimality_proven:
+        database.record_dead_end(game)
+    return moves, metrics
+
+
+SWEEP_DATABASE_PATH = "analysis_results/sweep.sqlite"
+SWEEP_CHUNK_SIZE = 8  # Deals handed to a sweep worker at a time
+
+
+def _sweep_worker(algorithm, move_options, max_states, numbers):
+    """
+    Solves the numbered deals `numbers` in a sweep worker process. Returns one
+    (deal, algorithm, solved, seconds, states explored, solution length,
+    solution) row per deal, the solution as 16-bit move codes.
+    """
+    _apply_move_options(move_options)
+    options = {} if max_states is None else {"max_states": max_states}
+    rows = []
+    for number in numbers:
+        start = time.time()
+        moves, metrics = solve_freecell(deal_game(number), algorithm, **options)
+        rows.append(
+            (
+                number,
+                algorithm,
+                moves is not None,
+                time.time() - start,
+                metrics.states_explored,
+                None if moves is None else len(moves),
+                None if moves is None else encode_moves(moves).tobytes(),
+            )
+        )
+    return rows
+
+
+def _open_sweep_database(path):
+    """Opens the sweep results database at `path`, creating it if needed."""
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS sweep_results ("
+            "deal INTEGER, algorithm TEXT, solved INTEGER, seconds REAL, "
+            "states_explored INTEGER, solution_length INTEGER, solution BLOB, "
+            "PRIMARY KEY (deal, algorithm))"
+        )
+    return connection
+
+
+def run_sweep(
+    first,
+    last,
+    algorithm="astar3",
+    path=SWEEP_DATABASE_PATH,
+    processes=None,
+    max_states=None,
+    chunk_size=SWEEP_CHUNK_SIZE,
+):
+    """
+    Solves the numbered deals first to last (see deal_game) with `algorithm`
+    in a pool of worker processes, chunk_size deals at a time, and records
+    each deal's outcome, time, states explored and solution in the SQLite
+    database at `path`. Results are committed as each chunk finishes, and
+    deals already recorded for the algorithm are skipped, so an interrupted
+    sweep continues where it stopped when run again. The portfolio solver
+    already races its algorithms in parallel, so its deals are solved one
+    chunk at a time in the calling process.
+
+    Returns:
+        dict: The summary of the range, as returned by sweep_summary().
+    """
+    connection = _open_sweep_database(path)
+    done = {
+        deal
+        for (deal,) in connection.execute(
+            "SELECT deal FROM sweep_results "
+            "WHERE algorithm = ? AND deal BETWEEN ? AND ?",
+            (algorithm, first, last),
+        )
+    }
+    numbers = [number for number in range(first, last + 1) if number not in done]
+    chunks = [
+        numbers[start : start + chunk_size]
+        for start in range(0, len(numbers), chunk_size)
+    ]
+    print(f"Sweep: {len(done)} deals already done, {len(numbers)} to solve")
+    worker = functools.partial(_sweep_worker, algorithm, _move_options(), max_states)
+    finished = 0
+    if algorithm == "portfolio":
+        # Pool workers are daemons and cannot start the portfolio's processes
+        pool = None
+        results = map(worker, chunks)
+    else:
+        pool = multiprocessing.get_context().Pool(processes)
+        results = pool.imap_unordered(worker, chunks)
+    for rows in results:
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO sweep_results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        finished += len(rows)
+        print(f"Sweep: {finished}/{len(numbers)} deals solved or given up")
+    if pool is not None:
+        # Workers are not terminated: pygame's signal handlers would ignore SIGTERM
+        pool.close()
+        pool.join()
+    summary = sweep_summary(first, last, algorithm, connection)
+    connection.close()
+    return summary
+
+
+def _percentiles(values):
+    """Returns the 50th, 90th and 99th percentiles and the maximum of `values`."""
+    values = sorted(values)
+    if not values:
+        return {}
+    return {
+        f"p{percent}": values[min(len(values) - 1, len(values) * percent // 100)]
+        for percent in (50, 90, 99)
+    } | {"max": values[-1]}
+
+
+def sweep_summary(first, last, algorithm="astar3", path=SWEEP_DATABASE_PATH):
+    """
+    Summarizes the recorded results of `algorithm` on deals first to last.
+    `path` may also be an open database connection.
+
+    Returns:
+        dict: The number of deals recorded and solved, the unsolved deal
+            numbers, and percentiles of the time and states explored (all
+            deals) and of the solution length (solved deals).
+    """
+    connection = path if isinstance(path, sqlite3.Connection) else sqlite3.connect(path)
+    rows = connection.execute(
+        "SELECT deal, solved, seconds, states_explored, solution_length "
+        "FROM sweep_results WHERE algorithm = ? AND deal BETWEEN ? AND ? "
+        "ORDER BY deal",
+        (algorithm, first, last),
+    ).fetchall()
+    if connection is not path:
+        connection.close()
+    return {
+        "algorithm": algorithm,
+        "deals": len(rows),
+        "solved": sum(1 for row in rows if row[1]),
+        "unsolved": [row[0] for row in rows if not row[1]],
+        "seconds": _percentiles(row[2] for row in rows),
+        "states_explored": _percentiles(row[3] for row in rows),
+        "solution_length": _percentiles(row[4] for row in rows if row[1]),
+    }
+
+
+def print_sweep_summary(summary):
+    """Prints a summary returned by sweep_summary()."""
+    print("\n" + "=" * 50)
+    print(f"SWEEP SUMMARY - {summary['algorithm']}")
+    print("=" * 50)
+    print(f"Deals: {summary['deals']}, solved: {summary['solved']}")
+    for field in ("seconds", "states_explored", "solution_length"):
+        values = ", ".join(
+            f"{name} {value:.4g}" for name, value in summary[field].items()
+        )
+        print(f"{field.replace('_', ' ').capitalize()}: {values}")
+    print(f"Unsolved deals: {summary['unsolved']}")
+    print("=" * 50)
 
 
 def main():
@@ -2555,6 +5474,7 @@ def main():
         - `initial_game`: Stores the initial game state for undo functionality.
     """
     global \
+        screen, \
         animation_delay, \
         paused, \
         game_timer, \
@@ -2574,6 +5494,9 @@ def main():
         empty_to_empty_moves_disabled, \
         initial_game
 
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("FreeCell Solver")
+
     deck_size = 52
     game = FreeCellGame(deck_size=deck_size)
     solution = None
@@ -2596,6 +5519,12 @@ def main():
         "WA*",
         "Meta",
         "Meta2",
+        "Portfolio",
+        "HDA*",
+        "Optimal A*",
+        "WA* PDB",
+        "External BFS",
+        "Frontier BFS",
     ]
     algorithm_index = 0
     hint_move = None
@@ -2766,6 +5695,12 @@ def main():
                                 "Meta2": "metaheuristic2",
                                 "A* Heu2": "astar2",
                                 "A* Heu3": "astar3",
+                                "Portfolio": "portfolio",
+                                "HDA*": "hda",
+                                "Optimal A*": "optimal_astar",
+                                "WA* PDB": "pattern_database",
+                                "External BFS": "external_bfs",
+                                "Frontier BFS": "frontier_bfs",
                             }
                             algo_key = algo_map.get(current_algorithm, "astar")
                             print(f"Using algorithm: {algo_key}")
@@ -2773,48 +5708,31 @@ def main():
                             # Create a deep copy of the initial game state before solving
                             initial_game = FreeCellGame(game)
 
-                            # Create a wrapper for solving with automoves
-                            original_get_valid_moves = FreeCellGame.get_valid_moves
-
-                            def automove_wrapper(self):
-                                """Wrapper that applies automoves logic using original method to avoid recursion"""
-                                auto_moves = self.get_automatic_foundation_moves()
-                                if auto_moves:
-                                    return auto_moves
-                                return original_get_valid_moves(self)
-
-                            # Replace get_valid_moves with our wrapper
-                            FreeCellGame.get_valid_moves = automove_wrapper
-
-                            try:
-                                solution_data, metrics = solve_freecell(game, algo_key)
-                                solution = solution_data
-                                solution_index = 0
-                                hint_move = last_moved_card = None
-                                selected_sequence = selected_sequence_source = None
+                            solution_data, metrics = solve_freecell(game, algo_key)
+                            solution = solution_data
+                            solution_index = 0
+                            hint_move = last_moved_card = None
+                            selected_sequence = selected_sequence_source = None
 
-                                if solution:
-                                    print(
-                                        f"{current_algorithm} solution found with {len(solution)} moves!"
-                                    )
-                                    metrics.print_report(f"{current_algorithm}")
-                                    stats = (solution, metrics.states_explored)
-                                    save_solution_to_file(
-                                        current_game_number,
-                                        solution,
-                                        metrics,
-                                        current_algorithm,
-                                        initial_game,
-                                    )
-                                else:
-                                    print(f"No {current_algorithm} solution found.")
-                                    metrics.print_report(
-                                        f"{current_algorithm} (No Solution)"
-                                    )
-                                    solving = False
-                            finally:
-                                # Restore the original method
-                                FreeCellGame.get_valid_moves = original_get_valid_moves
+                            if solution:
+                                print(
+                                    f"{current_algorithm} solution found with {len(solution)} moves!"
+                                )
+                                metrics.print_report(f"{current_algorithm}")
+                                stats = (solution, metrics.states_explored)
+                                save_solution_to_file(
+                                    current_game_number,
+                                    solution,
+                                    metrics,
+                                    current_algorithm,
+                                    initial_game,
+                                )
+                            else:
+                                print(f"No {current_algorithm} solution found.")
+                                metrics.print_report(
+                                    f"{current_algorithm} (No Solution)"
+                                )
+                                solving = False
 
                         elif 410 <= x <= 530 and 15 <= y <= 45:
                             game = FreeCellGame(deck_size=deck_size)
@@ -2986,4 +5904,45 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    if sys.argv[1:2] == ["--build-patterns"]:
+        # python Freecell.py --build-patterns [window]
+        build_pattern_database(window=int(sys.argv[2]) if len(sys.argv) > 2 else 6)
+    elif sys.argv[1:2] == ["--build-tablebase"]:
+        # python Freecell.py --build-tablebase [max_cards] [deck_size]
+        build_endgame_tablebase(
+            max_cards=int(sys.argv[2]) if len(sys.argv) > 2 else 5,
+            deck_size=int(sys.argv[3]) if len(sys.argv) > 3 else 52,
+        )
+    elif sys.argv[1:2] == ["--convert-games"]:
+        # python Freecell.py --convert-games corpus.fcdc [directory]
+        convert_game_files(sys.argv[2], *sys.argv[3:4])
+    elif sys.argv[1:2] == ["--generate-deals"]:
+        # python Freecell.py --generate-deals corpus.fcdc [first] [last]
+        first = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+        last = int(sys.argv[4]) if len(sys.argv) > 4 else 32000
+        write_deal_corpus(sys.argv[2], generate_deals(first, last + 1))
+    elif sys.argv[1:2] == ["--sweep"]:
+        # python Freecell.py --sweep first last [algorithm] [max_states]
+        print_sweep_summary(
+            run_sweep(
+                int(sys.argv[2]),
+                int(sys.argv[3]),
+                *sys.argv[4:5],
+                max_states=int(sys.argv[5]) if len(sys.argv) > 5 else None,
+            )
+        )
+    elif sys.argv[1:2] == ["--solution-text"]:
+        # python Freecell.py --solution-text solution.fcsl
+        _, moves = read_solution_file(sys.argv[2])
+        for i, move in enumerate(moves):
+            print(f"Move {i + 1}: {format_move(move)}")
+    elif sys.argv[1:2] == ["--resume"]:
+        # python Freecell.py --resume checkpoint [max_states]
+        moves, metrics = resume_freecell_search(
+            sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else None
+        )
+        metrics.print_report("Resumed search")
+        for move in moves or []:
+            print(format_move(move))
+    else:
+        main()
@@ -0,0 +1,54 @@
+import random
+
+import pytest
+
+import Freecell
+
+HEURISTICS = [
+    "heuristic1",
+    "heuristic2",
+    "heuristic3",
+    "meta_heuristic",
+    "meta_heuristic2",
+]
+
+
+def _sample_states(deals=range(1, 21), walk_length=80, seed=0):
+    """Positions met on random walks from several numbered deals."""
+    rng = random.Random(seed)
+    states = []
+    for number in deals:
+        game = Freecell.deal_game(number)
+        states.append(game)
+        for _ in range(walk_length):
+            moves = game.get_valid_moves()
+            if not moves or game.is_solved():
+                break
+            game = Freecell.FreeCellGame(game)
+            game.make_move(rng.choice(moves))
+            states.append(game)
+    return states
+
+
+@pytest.mark.parametrize("heuristic", HEURISTICS)
+def test_batch_heuristics_match_scalar(heuristic):
+    pytest.importorskip("numpy")
+    states = _sample_states()
+    scores = Freecell.BATCH_HEURISTICS[heuristic](Freecell.encode_states(states))
+    expected = [getattr(state, heuristic)() for state in states]
+    assert scores.tolist() == expected
+
+
+@pytest.mark.parametrize("heuristic", HEURISTICS)
+def test_heuristic_deltas_match_full_evaluation(heuristic):
+    evaluate = getattr(Freecell.FreeCellGame, heuristic)
+    delta = getattr(Freecell.FreeCellGame, heuristic + "_delta")
+    checked = 0
+    for parent in _sample_states(deals=range(1, 11), walk_length=40):
+        score = evaluate(parent)
+        for move in parent.get_valid_moves():
+            child, played = parent.successor(move)
+            if len(played) == 1:
+                assert delta(parent, score, played[0]) == evaluate(child), move
+                checked += 1
+    assert checked > 1000
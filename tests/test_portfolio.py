@@ -0,0 +1,29 @@
+import time
+
+import Freecell
+
+
+def _is_solution(game, moves):
+    game = Freecell.FreeCellGame(game)
+    for move in moves:
+        if move not in game.get_valid_moves():
+            return False
+        game.make_move(move)
+    return game.is_solved()
+
+
+def test_portfolio_passes_options_and_stops_losing_workers():
+    # metaheuristic2 solves deal 164 in about a second; astar spends well over
+    # a minute on the same budget
+    game = Freecell.deal_game(164)
+    start = time.time()
+    Freecell.solve_freecell(game, "metaheuristic2", max_states=40000)
+    winner_seconds = time.time() - start
+
+    start = time.time()
+    moves, metrics = Freecell.solve_freecell(
+        game, "portfolio", algorithms=["metaheuristic2", "astar"], max_states=40000
+    )
+    assert moves is not None and _is_solution(game, moves)
+    assert metrics.winning_algorithm == "metaheuristic2"
+    assert time.time() - start < 2 * winner_seconds + 5
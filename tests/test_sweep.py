@@ -0,0 +1,10 @@
+import Freecell
+
+
+def test_sweep_with_portfolio_and_max_states(tmp_path):
+    path = str(tmp_path / "sweep.sqlite")
+    summary = Freecell.run_sweep(
+        1, 2, "portfolio", path=path, processes=1, max_states=500
+    )
+    assert summary["deals"] == 2
+    assert summary["states_explored"]["max"] <= 500